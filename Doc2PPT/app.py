@@ -1,11 +1,23 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g
 import os
+import time
 import uuid
-from werkzeug.utils import secure_filename
-from modules.document_parser import DocumentParser
-from modules.pptx_generator import PPTXGenerator
+from werkzeug.exceptions import RequestEntityTooLarge
+from modules.conversion_cache import CHUNK_SIZE
+from modules.job_queue import JobQueue, QueueFullError
+from modules.upload_registry import UploadRegistry, UploadTooLargeError
+from main import run_conversion, init_job_worker, get_conversion_cache
+from service import (UPLOAD_FOLDER, OUTPUT_FOLDER, allowed_file, conversion_options, output_filename,
+                     serve_cached, conversion_job, status_payload, record_job_metrics,
+                     RequestError, merge_uploads, merge_filename, merge_job,
+                     batch_items, BatchTracker, MultipartUpload)
+from config import Config
+from utils.logger import setup_logging
+from utils.metrics import metrics, rss_mb
 from flask_cors import CORS
 
+setup_logging()
+
 app = Flask(__name__)
 
 CORS(app, resources={
@@ -16,49 +28,164 @@ CORS(app, resources={
     }
 })
 
-UPLOAD_FOLDER = 'uploads'
-OUTPUT_FOLDER = 'outputs'
-ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
-
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 
+# Reject oversized bodies while they are still being received; the slack
+# leaves room for the multipart headers around the file itself
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_FILE_SIZE + Config.UPLOAD_OVERHEAD_BYTES
+app.config['USE_X_SENDFILE'] = Config.USE_X_SENDFILE
+
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+upload_registry = UploadRegistry(Config.UPLOAD_INDEX, upload_folder=UPLOAD_FOLDER)
+
+def finish_job(job):
+    record_job_metrics(job)
+    batches.job_finished(job)
+
+job_queue = JobQueue(
+    run_conversion,
+    workers=Config.JOB_WORKERS,
+    max_depth=Config.JOB_QUEUE_DEPTH,
+    job_timeout=Config.JOB_TIMEOUT,
+    on_finish=finish_job,
+    initializer=init_job_worker,
+    max_jobs_per_worker=Config.JOB_MAX_PER_WORKER
+)
+batches = BatchTracker(job_queue, in_flight=Config.BATCH_IN_FLIGHT)
+
+@app.before_request
+def start_request_span():
+    g.request_start = time.perf_counter()
+    g.request_rss = rss_mb()
+
+@app.after_request
+def finish_request_span(response):
+    seconds = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('doc2ppt_http_request_seconds', seconds,
+                    endpoint=endpoint, method=request.method, status=response.status_code)
+
+    record = {'phase': 'http', 'endpoint': endpoint, 'method': request.method,
+              'status': response.status_code, 'seconds': round(seconds, 6)}
+    rss = rss_mb()
+    if rss is not None and g.request_rss is not None:
+        record['rss_mb'] = round(rss, 2)
+        record['rss_delta_mb'] = round(rss - g.request_rss, 2)
+    app.logger.info(f"{request.method} {endpoint} finished in {seconds:.3f}s", extra={'span': record})
+    return response
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
-    if 'document' not in request.files:
+    boundary = request.mimetype_params.get('boundary')
+    if request.mimetype != 'multipart/form-data' or not boundary:
         return jsonify({'error': 'No file part'}), 400
 
-    file = request.files['document']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+    # Parse the raw body ourselves (request.files would spool it to a temporary file first);
+    # request.stream stops at MAX_CONTENT_LENGTH
+    upload = MultipartUpload(boundary.encode('latin-1'))
+    try:
+        for chunk in iter(lambda: request.stream.read(CHUNK_SIZE), b''):
+            upload.feed(chunk)
+            if upload.error:
+                break
+        else:
+            upload.feed(None)
+    except (UploadTooLargeError, RequestEntityTooLarge) as e:
+        if upload.writer:
+            upload.writer.abort()
+        message = str(e) if isinstance(e, UploadTooLargeError) else \
+            f'File exceeds the {Config.MAX_FILE_SIZE} byte limit'
+        return jsonify({'error': message}), 413
+    except BaseException:
+        if upload.writer:
+            upload.writer.abort()
+        raise
+
+    if upload.error:
+        if upload.writer:
+            upload.writer.abort()
+        return jsonify({'error': upload.error}), 400
+    if not upload.found:
+        return jsonify({'error': 'No file part'}), 400
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_id = str(uuid.uuid4())
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-        file.save(filepath)
+    size, content_hash = upload.writer.finish()
+    upload_registry.register(upload.file_id, upload.writer.path, upload.filename,
+                             size=size, content_hash=content_hash)
 
+    return jsonify({
+        'success': True,
+        'fileId': upload.file_id,
+        'filename': upload.filename
+    })
+
+@app.route('/api/convert/merge', methods=['POST', 'OPTIONS'])
+def merge_files():
+    if request.method == 'OPTIONS':
+        response = jsonify({'success': True})
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        data = request.get_json(force=True, silent=True) or {}
+        uploads = merge_uploads(data, upload_registry)
+
+        merge_id = str(uuid.uuid4())
+        output_path = os.path.join(app.config['OUTPUT_FOLDER'], merge_filename(merge_id))
+        app.logger.info(f"Merge of {len(uploads)} documents queued as {merge_id}")
+
+        job_id = job_queue.submit(**merge_job(merge_id, uploads, conversion_options(data), output_path))
         return jsonify({
             'success': True,
-            'fileId': file_id,
-            'filename': filename
-        })
+            'jobId': job_id,
+            'statusUrl': f'/api/status/{job_id}'
+        }), 202
+
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        app.logger.error(f"Merge error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/convert/batch', methods=['POST', 'OPTIONS'])
+def batch_files():
+    if request.method == 'OPTIONS':
+        response = jsonify({'success': True})
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        data = request.get_json(force=True, silent=True) or {}
+        items = batch_items(data, upload_registry)
+
+        # Each file is its own job on the shared queue; the batch tracks them
+        batch_id = batches.submit(items)
+        app.logger.info(f"Batch of {len(items)} files queued as {batch_id}")
 
-    return jsonify({'error': 'Invalid file type'}), 400
+        return jsonify({
+            'success': True,
+            'batchId': batch_id,
+            'statusUrl': f'/api/batch/{batch_id}'
+        }), 202
+
+    except RequestError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        app.logger.error(f"Batch error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/convert/<file_id>', methods=['POST', 'OPTIONS'])
 def convert_file(file_id):
-    return jsonify({
-            'success': True,
-            'fileId': file_id,
-        })
     if request.method == 'OPTIONS':
         # Handle preflight request
         response = jsonify({'success': True})
@@ -69,61 +196,98 @@ def convert_file(file_id):
         # Get JSON data more robustly
         data = request.get_json(force=True, silent=True) or {}
 
-        uploads = os.listdir(app.config['UPLOAD_FOLDER'])
-        file_info = next((f for f in uploads if f.startswith(file_id)), None)
-
-        if not file_info:
+        upload = upload_registry.get(file_id)
+        if not upload:
             return jsonify({'error': 'File not found'}), 404
 
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info)
-        output_filename = f"converted_{file_id}.pptx"
-        output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
+        filename = output_filename(file_id)
+        output_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
 
         # Debug logging
-        app.logger.info(f"Conversion started for {file_id}")
+        app.logger.info(f"Conversion queued for {file_id}")
         app.logger.info(f"Request data: {data}")
 
         # Process customization options
-        audience = data.get('audience', 'executive')
-        length = data.get('length', 'medium')
-        include_summary = data.get('summary', True)
-        include_appendix = data.get('appendix', False)
-
-        # Document processing
-        parser = DocumentParser(input_path)
-        content = parser.extract_content()
-
-        generator = PPTXGenerator(output_path)
-        generator.generate_presentation(content,
-                                     audience=audience,
-                                     length=length,
-                                     include_summary=include_summary,
-                                     include_appendix=include_appendix)
+        options = conversion_options(data)
+
+        # Serve identical documents straight from the cache without queueing
+        if serve_cached(upload, options, output_path):
+            app.logger.info(f"Cache hit for {file_id}")
+            return jsonify({
+                'success': True,
+                'cached': True,
+                'downloadUrl': f'/api/download/{filename}',
+                'filename': filename
+            })
+
+        # Queue the conversion; a worker process does the parsing and generation
+        job_id = job_queue.submit(**conversion_job(file_id, upload, data, options, output_path))
 
         response = jsonify({
             'success': True,
-            'downloadUrl': f'/api/download/{output_filename}',
-            'filename': output_filename
+            'jobId': job_id,
+            'statusUrl': f'/api/status/{job_id}'
         })
 
         # Add CORS headers to the actual response
         response.headers.add('Access-Control-Allow-Origin', '*')
-        return response
+        return response, 202
+
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
 
     except Exception as e:
         app.logger.error(f"Conversion error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/status/<job_id>')
+def job_status(job_id):
+    response = status_payload(job_id, job_queue.status(job_id), job_queue.depth)
+    if not response:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(response)
+
+@app.route('/api/batch/<batch_id>')
+def batch_status(batch_id):
+    response = batches.status_payload(batch_id, job_queue.depth)
+    if not response:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(response)
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    cache = get_conversion_cache()
+    if not cache:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, **cache.stats()})
+
+@app.route('/api/metrics')
+def metrics_endpoint():
+    metrics.set('doc2ppt_job_queue_depth', job_queue.depth)
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 @app.route('/api/download/<filename>')
 def download_file(filename):
+    # conditional=True answers Range and If-None-Match/If-Modified-Since
+    # requests; the file body goes through wsgi.file_wrapper (sendfile) or
+    # X-Sendfile when USE_X_SENDFILE is on
     try:
-        return send_from_directory(
+        response = send_from_directory(
             app.config['OUTPUT_FOLDER'],
             filename,
-            as_attachment=True
+            as_attachment=True,
+            conditional=True,
+            etag=True,
+            max_age=Config.DOWNLOAD_MAX_AGE
         )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
     except FileNotFoundError:
         return jsonify({'error': 'File not found'}), 404
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': f'File exceeds the {Config.MAX_FILE_SIZE} byte limit'}), 413
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,506 @@
+# asgi.py - Async (ASGI) server for the conversion API
+"""
+Serves the same /api endpoints as app.py from an asyncio event loop.
+
+    python asgi.py                            # needs uvicorn
+    uvicorn asgi:application --port 5000
+
+Upload bodies are parsed incrementally as they arrive and status/download
+requests never wait on a conversion. Conversions run in a bounded set of
+worker processes (AsyncJobQueue); once those and the waiting slots are
+taken, /api/convert answers 429 with Retry-After instead of queueing more
+work. Uploads beyond ASYNC_MAX_UPLOADS in flight are shed the same way.
+
+Job state lives in the server process, so run a single server process.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from werkzeug.exceptions import HTTPException, NotFound
+from werkzeug.http import parse_options_header
+from werkzeug.utils import send_from_directory
+from werkzeug.wsgi import FileWrapper
+
+from config import Config
+from main import run_conversion, init_job_worker, get_conversion_cache
+from modules.conversion_cache import CHUNK_SIZE
+from modules.job_queue import AsyncJobQueue, QueueFullError
+from modules.upload_registry import UploadRegistry, UploadTooLargeError
+from service import (UPLOAD_FOLDER, OUTPUT_FOLDER, allowed_file, conversion_options, output_filename,
+                     serve_cached, conversion_job, status_payload, record_job_metrics,
+                     RequestError, merge_uploads, merge_filename, merge_job,
+                     batch_items, BatchTracker, MultipartUpload)
+from utils.logger import setup_logging
+from utils.metrics import metrics, rss_mb
+
+setup_logging()
+logger = logging.getLogger("doc2ppt.asgi")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAX_BODY_SIZE = Config.MAX_FILE_SIZE + Config.UPLOAD_OVERHEAD_BYTES
+MAX_JSON_SIZE = 1024 * 1024
+
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+upload_registry = UploadRegistry(Config.UPLOAD_INDEX, upload_folder=UPLOAD_FOLDER)
+
+def finish_job(job: Dict):
+    record_job_metrics(job)
+    batches.job_finished(job)
+
+
+job_queue = AsyncJobQueue(
+    run_conversion,
+    workers=Config.ASYNC_WORKERS,
+    max_depth=Config.ASYNC_QUEUE_DEPTH,
+    job_timeout=Config.JOB_TIMEOUT,
+    on_finish=finish_job,
+    default_retry_after=Config.ASYNC_RETRY_AFTER,
+    initializer=init_job_worker,
+    max_jobs_per_worker=Config.JOB_MAX_PER_WORKER
+)
+batches = BatchTracker(job_queue, in_flight=Config.BATCH_IN_FLIGHT)
+
+uploads_in_flight = 0
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the request body was received"""
+
+
+class Request:
+    """The parts of an ASGI HTTP request the handlers need"""
+
+    def __init__(self, scope: Dict, receive: Callable):
+        self.scope = scope
+        self.receive = receive
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = {}
+        for name, value in scope["headers"]:
+            name, value = name.decode("latin-1").lower(), value.decode("latin-1")
+            self.headers[name] = f"{self.headers[name]}, {value}" if name in self.headers else value
+
+    async def stream(self):
+        """Yield body chunks as they arrive"""
+        while True:
+            message = await self.receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnected()
+            if message.get("body"):
+                yield message["body"]
+            if not message.get("more_body"):
+                return
+
+    async def body(self, limit: int) -> bytes:
+        chunks, size = [], 0
+        async for chunk in self.stream():
+            size += len(chunk)
+            if size > limit:
+                raise UploadTooLargeError(f"Request body exceeds the {limit} byte limit")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def environ(self) -> Dict:
+        """Minimal WSGI environ, for werkzeug's conditional/range response helpers"""
+        server = self.scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": self.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": self.path,
+            "QUERY_STRING": self.scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": str(server[0]),
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{self.scope.get('http_version', '1.1')}",
+            "wsgi.url_scheme": self.scope.get("scheme", "http"),
+            "wsgi.file_wrapper": lambda file, buffer_size=CHUNK_SIZE: FileWrapper(file, CHUNK_SIZE)
+        }
+        for name, value in self.headers.items():
+            key = name.upper().replace("-", "_")
+            environ[key if key in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{key}"] = value
+        return environ
+
+
+async def send_response(send: Callable, status: int, body: bytes = b"",
+                        content_type: str = "application/json", headers: Optional[Dict] = None):
+    raw_headers = [(b"content-type", content_type.encode("latin-1")),
+                   (b"content-length", str(len(body)).encode("latin-1"))]
+    raw_headers += [(name.lower().encode("latin-1"), str(value).encode("latin-1"))
+                    for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send: Callable, status: int, payload: Dict, headers: Optional[Dict] = None):
+    await send_response(send, status, json.dumps(payload).encode("utf-8") + b"\n", headers=headers)
+
+
+async def send_wsgi_response(send: Callable, response, environ: Dict):
+    """Send a werkzeug response, reading its body off the event loop"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                              for name, value in headers]
+
+    body = response(environ, start_response)
+    try:
+        await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+        chunks = iter(body)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+
+
+async def upload_file(request: Request, send: Callable):
+    global uploads_in_flight
+
+    if uploads_in_flight >= Config.ASYNC_MAX_UPLOADS:
+        return await send_json(send, 429, {'error': 'Too many uploads in progress, try again later'},
+                               headers={'Retry-After': 1})
+
+    try:
+        content_length = int(request.headers.get('content-length') or 0)
+    except ValueError:
+        content_length = -1
+    if content_length < 0:
+        return await send_json(send, 400, {'error': 'Invalid Content-Length header'})
+    if content_length > MAX_BODY_SIZE:
+        return await send_json(send, 413, {'error': f'File exceeds the {Config.MAX_FILE_SIZE} byte limit'})
+
+    mimetype, options = parse_options_header(request.headers.get('content-type', ''))
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        return await send_json(send, 400, {'error': 'No file part'})
+
+    # File writes (and the registry's SQLite insert) run in a thread so a large
+    # upload on a slow disk does not stall the event loop for other requests
+    upload = MultipartUpload(options['boundary'].encode('latin-1'))
+    uploads_in_flight += 1
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > MAX_BODY_SIZE:
+                raise UploadTooLargeError(f"File exceeds the {Config.MAX_FILE_SIZE} byte limit")
+            await asyncio.to_thread(upload.feed, chunk)
+            if upload.error:
+                break
+        else:
+            await asyncio.to_thread(upload.feed, None)
+    except (UploadTooLargeError, HTTPException) as e:
+        if upload.writer:
+            await asyncio.to_thread(upload.writer.abort)
+        message = str(e) if isinstance(e, UploadTooLargeError) else \
+            f'File exceeds the {Config.MAX_FILE_SIZE} byte limit'
+        return await send_json(send, 413, {'error': message})
+    except BaseException:
+        if upload.writer:
+            upload.writer.abort()
+        raise
+    finally:
+        uploads_in_flight -= 1
+
+    if upload.error:
+        if upload.writer:
+            await asyncio.to_thread(upload.writer.abort)
+        return await send_json(send, 400, {'error': upload.error})
+    if not upload.found:
+        return await send_json(send, 400, {'error': 'No file part'})
+
+    size, content_hash = await asyncio.to_thread(upload.writer.finish)
+    await asyncio.to_thread(upload_registry.register, upload.file_id, upload.writer.path, upload.filename,
+                            size=size, content_hash=content_hash)
+
+    await send_json(send, 200, {
+        'success': True,
+        'fileId': upload.file_id,
+        'filename': upload.filename
+    })
+
+
+async def convert_file(request: Request, send: Callable, file_id: str):
+    try:
+        try:
+            data = json.loads(await request.body(MAX_JSON_SIZE) or b'null')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        upload = upload_registry.get(file_id)
+        if not upload:
+            return await send_json(send, 404, {'error': 'File not found'})
+
+        filename = output_filename(file_id)
+        output_path = os.path.join(OUTPUT_FOLDER, filename)
+        options = conversion_options(data)
+        logger.info(f"Conversion queued for {file_id}")
+
+        # Serve identical documents straight from the cache without queueing
+        if await asyncio.to_thread(serve_cached, upload, options, output_path):
+            logger.info(f"Cache hit for {file_id}")
+            return await send_json(send, 200, {
+                'success': True,
+                'cached': True,
+                'downloadUrl': f'/api/download/{filename}',
+                'filename': filename
+            })
+
+        job_id = job_queue.submit(**conversion_job(file_id, upload, data, options, output_path))
+        await send_json(send, 202, {
+            'success': True,
+            'jobId': job_id,
+            'statusUrl': f'/api/status/{job_id}'
+        })
+
+    except QueueFullError as e:
+        await send_json(send, 429, {'error': str(e)}, headers={'Retry-After': e.retry_after})
+
+    except (ClientDisconnected, asyncio.CancelledError):
+        raise
+
+    except Exception as e:
+        logger.error(f"Conversion error: {str(e)}")
+        await send_json(send, 500, {'error': str(e)})
+
+
+async def merge_files(request: Request, send: Callable):
+    try:
+        try:
+            data = json.loads(await request.body(MAX_JSON_SIZE) or b'null')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        uploads = merge_uploads(data, upload_registry)
+        merge_id = str(uuid.uuid4())
+        output_path = os.path.join(OUTPUT_FOLDER, merge_filename(merge_id))
+        logger.info(f"Merge of {len(uploads)} documents queued as {merge_id}")
+
+        job_id = job_queue.submit(**merge_job(merge_id, uploads, conversion_options(data), output_path))
+        await send_json(send, 202, {
+            'success': True,
+            'jobId': job_id,
+            'statusUrl': f'/api/status/{job_id}'
+        })
+
+    except RequestError as e:
+        await send_json(send, e.status, {'error': str(e)})
+
+    except QueueFullError as e:
+        await send_json(send, 429, {'error': str(e)}, headers={'Retry-After': e.retry_after})
+
+    except (ClientDisconnected, asyncio.CancelledError):
+        raise
+
+    except Exception as e:
+        logger.error(f"Merge error: {str(e)}")
+        await send_json(send, 500, {'error': str(e)})
+
+
+async def batch_files(request: Request, send: Callable):
+    try:
+        try:
+            data = json.loads(await request.body(MAX_JSON_SIZE) or b'null')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        items = batch_items(data, upload_registry)
+
+        # Each file is its own job on the shared queue; the batch tracks them
+        batch_id = batches.submit(items)
+        logger.info(f"Batch of {len(items)} files queued as {batch_id}")
+        await send_json(send, 202, {
+            'success': True,
+            'batchId': batch_id,
+            'statusUrl': f'/api/batch/{batch_id}'
+        })
+
+    except RequestError as e:
+        await send_json(send, e.status, {'error': str(e)})
+
+    except QueueFullError as e:
+        await send_json(send, 429, {'error': str(e)}, headers={'Retry-After': e.retry_after})
+
+    except (ClientDisconnected, asyncio.CancelledError):
+        raise
+
+    except Exception as e:
+        logger.error(f"Batch error: {str(e)}")
+        await send_json(send, 500, {'error': str(e)})
+
+
+async def job_status(request: Request, send: Callable, job_id: str):
+    response = status_payload(job_id, job_queue.status(job_id), job_queue.depth)
+    if not response:
+        return await send_json(send, 404, {'error': 'Job not found'})
+    await send_json(send, 200, response)
+
+
+async def batch_status(request: Request, send: Callable, batch_id: str):
+    response = batches.status_payload(batch_id, job_queue.depth)
+    if not response:
+        return await send_json(send, 404, {'error': 'Batch not found'})
+    await send_json(send, 200, response)
+
+
+async def cache_stats(request: Request, send: Callable):
+    cache = get_conversion_cache()
+    if not cache:
+        return await send_json(send, 200, {'success': True, 'enabled': False})
+    stats = await asyncio.to_thread(cache.stats)
+    await send_json(send, 200, {'success': True, 'enabled': True, **stats})
+
+
+async def metrics_endpoint(request: Request, send: Callable):
+    metrics.set('doc2ppt_job_queue_depth', job_queue.depth)
+    await send_response(send, 200, metrics.render().encode('utf-8'),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+async def download_file(request: Request, send: Callable, filename: str):
+    # Same response as app.py: werkzeug answers Range and If-None-Match/
+    # If-Modified-Since, and the body is read in chunks off the event loop
+    environ = request.environ()
+    try:
+        response = send_from_directory(
+            OUTPUT_FOLDER,
+            filename,
+            environ,
+            as_attachment=True,
+            conditional=True,
+            etag=True,
+            max_age=Config.DOWNLOAD_MAX_AGE,
+            use_x_sendfile=Config.USE_X_SENDFILE,
+            _root_path=ROOT
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+    except NotFound:
+        return await send_json(send, 404, {'error': 'File not found'})
+    except HTTPException as e:
+        response = e.get_response(environ)
+    await send_wsgi_response(send, response, environ)
+
+
+def route(rule: str) -> re.Pattern:
+    """Compile a '/api/status/<job_id>' style rule"""
+    return re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", rule) + "$")
+
+
+ROUTES: List[Tuple[str, re.Pattern, Tuple[str, ...], Callable]] = [
+    (rule, route(rule), methods, handler)
+    for rule, methods, handler in [
+        ('/api/upload', ('POST',), upload_file),
+        ('/api/convert/merge', ('POST',), merge_files),  # Before the <file_id> rule, which would match them
+        ('/api/convert/batch', ('POST',), batch_files),
+        ('/api/convert/<file_id>', ('POST',), convert_file),
+        ('/api/status/<job_id>', ('GET',), job_status),
+        ('/api/batch/<batch_id>', ('GET',), batch_status),
+        ('/api/cache/stats', ('GET',), cache_stats),
+        ('/api/metrics', ('GET',), metrics_endpoint),
+        ('/api/download/<filename>', ('GET',), download_file)
+    ]
+]
+
+
+async def dispatch(request: Request, send: Callable) -> str:
+    """Route a request to its handler and return the matched rule"""
+    for rule, pattern, methods, handler in ROUTES:
+        match = pattern.match(request.path)
+        if not match:
+            continue
+        if request.method == 'OPTIONS':
+            # CORS preflight, as flask-cors answers it for app.py
+            await send_json(send, 200, {'success': True}, headers={
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type'
+            })
+            return rule
+        if request.method not in methods and not (request.method == 'HEAD' and 'GET' in methods):
+            await send_json(send, 405, {'error': 'Method not allowed'})
+            return rule
+        await handler(request, send, **match.groupdict())
+        return rule
+
+    await send_json(send, 404, {'error': 'Not found'})
+    return 'unmatched'
+
+
+async def lifespan(receive: Callable, send: Callable):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            job_queue.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            job_queue.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope: Dict, receive: Callable, send: Callable):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    request = Request(scope, receive)
+    start, start_rss = time.perf_counter(), rss_mb()
+    state = {'status': None}
+
+    async def send_with_headers(message):
+        if message["type"] == "http.response.start":
+            state['status'] = message["status"]
+            if request.path.startswith('/api/'):
+                message = dict(message, headers=list(message["headers"]) + [(b"access-control-allow-origin", b"*")])
+        elif request.method == 'HEAD':
+            message = dict(message, body=b"")
+        await send(message)
+
+    endpoint = 'unmatched'
+    try:
+        endpoint = await dispatch(request, send_with_headers)
+    except ClientDisconnected:
+        state['status'] = state['status'] or 499
+    except Exception as e:
+        logger.error(f"{request.method} {request.path} failed: {str(e)}")
+        if state['status'] is None:
+            await send_json(send_with_headers, 500, {'error': str(e)})
+    finally:
+        seconds = time.perf_counter() - start
+        status = state['status'] or 500
+        metrics.observe('doc2ppt_http_request_seconds', seconds,
+                        endpoint=endpoint, method=request.method, status=status)
+
+        record = {'phase': 'http', 'endpoint': endpoint, 'method': request.method,
+                  'status': status, 'seconds': round(seconds, 6)}
+        rss = rss_mb()
+        if rss is not None and start_rss is not None:
+            record['rss_mb'] = round(rss, 2)
+            record['rss_delta_mb'] = round(rss - start_rss, 2)
+        logger.info(f"{request.method} {endpoint} finished in {seconds:.3f}s", extra={'span': record})
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise SystemExit(f"The async server needs the 'uvicorn' package: {str(e)}")
+    uvicorn.run(application, host='0.0.0.0', port=5000)
@@ -0,0 +1,87 @@
+# benchmarks/bench_memory.py - Memory footprint of the parsed section representation
+"""
+Compare the memory held by parsed sections in the compact Document form
+against the list-of-dicts form it replaced.
+
+Run from the Doc2PPT directory:
+
+    python -m benchmarks.bench_memory --sizes 100 1000
+
+For each synthetic text document the sections are built both ways while
+streaming its lines from disk. The retained size is what tracemalloc still
+counts once the structure is built; the peak includes transient allocations
+made while building it.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from benchmarks.synthetic import VARIANTS, generate_document
+from modules.document_parser import DocumentParser
+
+
+def read_lines(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as file:
+        yield from file
+
+
+def build_dicts(lines: Iterable[str]) -> List[Dict]:
+    """The previous representation: one dict and list per section, one str per line"""
+    structured_data = []
+    current_section = {"title": "Introduction", "content": []}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("# "):
+            if current_section["content"] or current_section["title"] != "Introduction":
+                structured_data.append(current_section)
+            current_section = {"title": line[2:].strip(), "content": []}
+        else:
+            current_section["content"].append(line)
+    if current_section["content"] or current_section["title"] != "Introduction":
+        structured_data.append(current_section)
+    return structured_data
+
+
+def retained_mb(build: Callable) -> tuple:
+    """Memory still allocated after build() returns, and the peak while it ran"""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, (current - baseline) / (1024 * 1024), (peak - baseline) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure memory held by parsed sections, compact vs dicts",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Page counts")
+    parser.add_argument("--variant", choices=VARIANTS, default="headings")
+    parser.add_argument("--input-dir", default=os.path.join(tempfile.gettempdir(), "doc2ppt-bench"),
+                        help="Where synthetic documents are generated and reused")
+    args = parser.parse_args()
+
+    print(f"{'document':<30} {'lines':>8} {'dicts':>9} {'compact':>9} {'saved':>6} "
+          f"{'peak dicts':>11} {'peak compact':>13}")
+    for pages in args.sizes:
+        path = generate_document(args.input_dir, "txt", pages, args.variant)
+        doc_parser = DocumentParser(path)
+
+        _, dicts_mb, dicts_peak = retained_mb(lambda: build_dicts(read_lines(path)))
+        compact, compact_mb, compact_peak = retained_mb(lambda: doc_parser._structure_lines(read_lines(path)))
+
+        saved = 1 - compact_mb / dicts_mb if dicts_mb else 0
+        print(f"{os.path.basename(path):<30} {compact.line_count:>8} {dicts_mb:>8.2f}M {compact_mb:>8.2f}M "
+              f"{saved:>6.0%} {dicts_peak:>10.2f}M {compact_peak:>12.2f}M")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_merge.py - Peak memory of merged conversions
+"""
+Check that merging documents peaks like converting the largest one alone.
+
+Run from the Doc2PPT directory:
+
+    python -m benchmarks.bench_merge --pages 2000 --documents 1 2 3
+
+merge_documents() parses one document at a time; each parsed document
+must be freed before the next is loaded. Peaks are traced with the cyclic
+garbage collector off, so a document kept alive by a reference cycle
+shows up as a peak that grows with the number of documents.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+from typing import Callable
+
+from config import Config
+from benchmarks.synthetic import VARIANTS, generate_document
+from main import convert_document, merge_documents
+
+
+def peak_mb(run: Callable) -> float:
+    """Peak traced MB while run() executes, with the cyclic collector off"""
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure peak memory of merged conversions against a single conversion",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--pages", type=int, default=2000, help="Pages per document")
+    parser.add_argument("--format", choices=["txt", "docx", "pdf"], default="txt")
+    parser.add_argument("--variant", choices=VARIANTS, default="numbers")
+    parser.add_argument("--documents", type=int, nargs="+", default=[1, 2, 3], help="Documents per merge")
+    parser.add_argument("--input-dir", default=os.path.join(tempfile.gettempdir(), "doc2ppt-bench"),
+                        help="Where synthetic documents are generated and reused")
+    args = parser.parse_args()
+    Config.CACHE_ENABLED = False
+    Config.LINEAGE_ENABLED = False
+
+    path = generate_document(args.input_dir, args.format, args.pages, args.variant)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    with tempfile.TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, "out.pptx")
+        convert_document(path, output, use_cache=False)  # Warm up: lazy imports and caches
+        single = peak_mb(lambda: convert_document(path, output, use_cache=False))
+
+        print(f"{os.path.basename(path)}: {size_mb:.1f} MB, single conversion peak {single:.1f}M")
+        print(f"{'documents':>9} {'peak':>9} {'vs single':>10}")
+        for count in args.documents:
+            peak = peak_mb(lambda: merge_documents([path] * count, output))
+            print(f"{count:>9} {peak:>8.1f}M {peak / single:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
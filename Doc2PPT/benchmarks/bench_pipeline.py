@@ -0,0 +1,183 @@
+# benchmarks/bench_pipeline.py - Per-stage conversion pipeline benchmark
+"""
+Time each stage of the conversion pipeline on synthetic documents.
+
+Run from the Doc2PPT directory:
+
+    python -m benchmarks.bench_pipeline --sizes 1 10 100
+    python -m benchmarks.bench_pipeline --save-baseline   # record a new baseline
+
+Every stage is timed with tracing off, then run again under tracemalloc to
+record its peak memory. "extract" reads the document's raw lines and
+"structure" builds sections from them; parse() streams one into the other,
+so here the lines are collected in between. Results are compared against the stored baseline
+and the run exits non-zero when a stage regresses past the tolerance, or
+when there is no baseline to compare against. Timings depend on the
+machine, so the baseline is recorded where the check runs and is not
+committed; with --check, stages missing from the baseline fail too.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import VARIANTS, generate_document
+from modules.data_analyzer import DataAnalyzer
+from modules.document_parser import DocumentParser
+from modules.pptx_generator import PPTXGenerator
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")  # Not committed (.gitignore)
+# Raw line stream of each format, which parse() feeds to _structure_lines()
+LINE_SOURCES = {"txt": "_iter_txt_lines", "docx": "_iter_docx_lines", "pdf": "_iter_pdf_lines"}
+BACKENDS = {"pdf": "pdfplumber"}
+
+
+def measure(func: Callable, trace_memory: bool):
+    """Run func once and return (result, seconds, peak_mb)"""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        seconds = time.perf_counter() - start
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return result, seconds, peak_mb
+
+
+def run_pipeline(path: str, output_dir: str, trace_memory: bool,
+                 audience: str = "technical", length: str = "long") -> Dict[str, Dict]:
+    """Run every pipeline stage on one document and return per-stage measurements"""
+    ext = os.path.splitext(path)[-1].lower().lstrip(".")
+    parser = DocumentParser(path)
+    if ext in BACKENDS:
+        parser._load_backend(BACKENDS[ext])  # Imported once per process, not part of extraction
+    stages = {}
+
+    def record(name, func):
+        result, seconds, peak_mb = measure(func, trace_memory)
+        stages[name] = {"seconds": seconds, "peak_mb": peak_mb}
+        return result
+
+    lines = record("extract", lambda: list(getattr(parser, LINE_SOURCES[ext])()))
+    sections = record("structure", lambda: parser._structure_lines(lines))
+    del lines
+
+    view = record("filter", lambda: parser._filter_content(sections, audience, length))
+
+    generator = PPTXGenerator(os.path.join(output_dir, os.path.basename(path) + ".pptx"))
+    record("generate", lambda: generator.generate_presentation(
+        view, audience_level=audience, presentation_length=length, save=False, filter_content=False
+    ))
+
+    def analyze():
+        analyzer = DataAnalyzer()
+        analyzer.extract_and_analyze(view)
+        generator.add_analytics(analyzer)
+        return analyzer
+
+    record("analyze", analyze)
+    record("save", generator.save)
+    return stages
+
+
+def run_benchmarks(sizes: List[int], formats: List[str], variants: List[str],
+                   input_dir: str, repeat: int = 1) -> Dict[str, Dict]:
+    """Benchmark every (format, variant, size) combination; best-of-N wall time"""
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for fmt in formats:
+            for variant in variants:
+                for pages in sizes:
+                    path = generate_document(input_dir, fmt, pages, variant)
+                    timings = [run_pipeline(path, output_dir, trace_memory=False) for _ in range(repeat)]
+                    memory = run_pipeline(path, output_dir, trace_memory=True)
+
+                    for stage in memory:
+                        key = f"{fmt}/{variant}/{pages}p/{stage}"
+                        results[key] = {
+                            "seconds": round(min(run[stage]["seconds"] for run in timings), 6),
+                            "peak_mb": round(memory[stage]["peak_mb"], 3)
+                        }
+                        print(f"{key:<36} {results[key]['seconds']:>10.4f}s {results[key]['peak_mb']:>10.2f}MB")
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float, min_seconds: float, strict: bool = False) -> List[str]:
+    """List stages that got slower or hungrier than the baseline allows (or, if strict, lack one)"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            if strict:
+                regressions.append(f"{key}: not in the baseline")
+            continue
+        slower = current["seconds"] - previous["seconds"]
+        if slower > min_seconds and current["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append(f"{key}: {previous['seconds']:.4f}s -> {current['seconds']:.4f}s")
+        if current["peak_mb"] > max(previous["peak_mb"] * (1 + tolerance), previous["peak_mb"] + 1):
+            regressions.append(f"{key}: {previous['peak_mb']:.2f}MB -> {current['peak_mb']:.2f}MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the conversion pipeline stage by stage",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000], help="Page counts")
+    parser.add_argument("--formats", nargs="+", choices=list(LINE_SOURCES), default=list(LINE_SOURCES))
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per document (best is kept)")
+    parser.add_argument("--input-dir", default=os.path.join(tempfile.gettempdir(), "doc2ppt-bench"),
+                        help="Where synthetic documents are generated and reused")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--check", action="store_true",
+                        help="CI mode: also fail for measured stages the baseline does not cover")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.formats, args.variants, args.input_dir, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+        sys.exit(2)
+
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        regressions = compare(results, json.load(file), args.tolerance, args.min_seconds, strict=args.check)
+
+    if regressions:
+        print("Regressions against baseline:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
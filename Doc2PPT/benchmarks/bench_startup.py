@@ -0,0 +1,79 @@
+# benchmarks/bench_startup.py - Cold-start benchmark for the CLI and workers
+"""
+Measure cold-start cost in fresh interpreter processes.
+
+Run from the Doc2PPT directory:
+
+    python -m benchmarks.bench_startup --repeat 10
+
+Each scenario is timed twice: with the lazy import graph the code uses
+today, and with the format backends and analytics stack imported up front
+the way they used to be. The difference is the startup cost saved per
+short-lived process.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_document
+
+EAGER_IMPORTS = "import docx, pdfplumber, pandas, numpy, matplotlib.pyplot\n"
+HEAVY_MODULES = ("docx", "pdfplumber", "pandas", "numpy", "matplotlib")
+
+SCENARIOS = {
+    "import main": "import main\n",
+    "txt conversion, analytics off": (
+        "from config import Config\n"
+        "Config.ENABLE_ANALYTICS = False\n"
+        "import main\n"
+        "result = main.convert_document({input!r}, {output!r}, use_cache=False)\n"
+        "assert result['success'], result\n"
+    )
+}
+
+
+def time_process(code: str, repeat: int) -> float:
+    """Median wall time of running code in a fresh interpreter"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def loaded_heavy_modules(code: str) -> list:
+    """Which heavy packages a snippet ends up importing"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = code + f"import sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    output = subprocess.run([sys.executable, "-c", probe], cwd=root, check=True,
+                            capture_output=True, text=True).stdout.strip().splitlines()
+    return [m for m in (output[-1] if output else "").split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start with lazy vs eager imports")
+    parser.add_argument("--repeat", type=int, default=5, help="Processes per measurement (median is kept)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = generate_document(tmp, "txt", 1)
+        output_path = os.path.join(tmp, "out.pptx")
+
+        print(f"{'scenario':<32} {'lazy':>9} {'eager':>9} {'saved':>9}  heavy modules loaded (lazy)")
+        for name, template in SCENARIOS.items():
+            code = template.format(input=input_path, output=output_path)
+            lazy = time_process(code, args.repeat)
+            eager = time_process(EAGER_IMPORTS + code, args.repeat)
+            loaded = ", ".join(loaded_heavy_modules(code)) or "none"
+            print(f"{name:<32} {lazy:>8.3f}s {eager:>8.3f}s {eager - lazy:>8.3f}s  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_txt.py - Plain-text extraction throughput
+"""
+Compare the streaming TXT extraction with the read-everything path it replaced.
+
+Run from the Doc2PPT directory:
+
+    python -m benchmarks.bench_txt --sizes 1000 10000
+    python -m benchmarks.bench_txt --encoding utf-16
+
+The previous path read the whole file into one string and split it into a
+list of lines before structuring it; the current one memory-maps the file
+and structures lines as they are decoded. Throughput is the best of
+--repeat runs with tracing off; the peak is measured in a separate traced
+run. The previous path only read UTF-8 and fails on anything else that is
+not valid UTF-8; the synthetic text is ASCII, so that takes an encoding
+such as utf-16.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.synthetic import VARIANTS, generate_document
+from modules.document_model import Document
+from modules.document_parser import DocumentParser
+
+
+def read_split(parser: DocumentParser) -> Document:
+    """The previous path: the whole file as one string, then one list of lines"""
+    with open(parser.filepath, "r", encoding="utf-8") as file:
+        return parser._structure_content(file.read())
+
+
+def encoded_copy(path: str, encoding: str) -> str:
+    """The synthetic UTF-8 document re-encoded, next to the original"""
+    if encoding == "utf-8":
+        return path
+    target = f"{os.path.splitext(path)[0]}.{encoding}.txt"
+    if not os.path.exists(target):
+        with open(path, "r", encoding="utf-8") as source, open(target, "w", encoding=encoding) as copy:
+            for line in source:
+                copy.write(line)
+    return target
+
+
+def throughput(extract: Callable, size_mb: float, repeat: int) -> tuple:
+    """Best MB/s over repeat runs, and the peak traced MB of one more run"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    tracemalloc.start()
+    try:
+        extract()
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+    return size_mb / best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure TXT extraction throughput, streaming vs read-and-split",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Page counts")
+    parser.add_argument("--variant", choices=VARIANTS, default="plain")
+    parser.add_argument("--encoding", default="utf-8", help="Encoding of the benchmarked files")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per path (best is kept)")
+    parser.add_argument("--input-dir", default=os.path.join(tempfile.gettempdir(), "doc2ppt-bench"),
+                        help="Where synthetic documents are generated and reused")
+    args = parser.parse_args()
+
+    print(f"{'document':<36} {'MB':>8} {'read MB/s':>10} {'stream MB/s':>12} {'speedup':>8} "
+          f"{'read peak':>10} {'stream peak':>12}")
+    for pages in args.sizes:
+        path = encoded_copy(generate_document(args.input_dir, "txt", pages, args.variant), args.encoding)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        doc_parser = DocumentParser(path)
+
+        stream_rate, stream_peak = throughput(doc_parser._extract_txt, size_mb, args.repeat)
+        try:
+            read_rate, read_peak = throughput(lambda: read_split(doc_parser), size_mb, args.repeat)
+            read = (f"{read_rate:>10.1f}", f"{stream_rate / read_rate:>7.2f}x", f"{read_peak:>9.1f}M")
+        except UnicodeDecodeError:
+            read = (f"{'fails':>10}", f"{'':>8}", f"{'':>10}")
+
+        print(f"{os.path.basename(path):<36} {size_mb:>8.1f} {read[0]} {stream_rate:>12.1f} {read[1]} "
+              f"{read[2]} {stream_peak:>11.1f}M")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/synthetic.py - Synthetic input documents for benchmarks
+import os
+import random
+from typing import Iterator, List
+
+import docx
+
+LINES_PER_PAGE = 40
+
+WORDS = [
+    "revenue", "growth", "market", "customer", "product", "strategy", "quarter",
+    "analysis", "performance", "operations", "risk", "forecast", "segment",
+    "pipeline", "margin", "investment", "platform", "delivery", "team", "region"
+]
+
+HEADINGS = ["Summary", "Key Findings", "Results", "Background", "Method", "Discussion", "Conclusion"]
+
+VARIANTS = ("plain", "headings", "numbers")
+
+
+def generate_lines(pages: int, variant: str = "plain", seed: int = 0) -> Iterator[str]:
+    """
+    Yield the lines of a synthetic document.
+
+    Headings are marked with '# ' like the parser expects. 'plain' has a
+    heading every couple of pages, 'headings' one every three lines, and
+    'numbers' packs each line with numbers, percentages, currency and ranges.
+    """
+    rng = random.Random(seed)
+    heading_every = {"plain": LINES_PER_PAGE * 2, "headings": 3, "numbers": LINES_PER_PAGE}[variant]
+
+    for i in range(pages * LINES_PER_PAGE):
+        if i % heading_every == 0:
+            yield f"# {rng.choice(HEADINGS)} {i // heading_every + 1}"
+            continue
+
+        words = rng.choices(WORDS, k=12)
+        if variant == "numbers":
+            words[2] = f"{rng.randint(1, 999):,}"
+            words[5] = f"{rng.uniform(0, 100):.1f}%"
+            words[8] = f"${rng.randint(1, 9999):,}.{rng.randint(0, 99):02d}"
+            words[10] = f"{rng.randint(1, 50)}-{rng.randint(51, 100)}"
+        yield " ".join(words).capitalize() + "."
+
+
+def write_txt(path: str, lines: List[str]):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines))
+
+
+def write_docx(path: str, lines: List[str]):
+    document = docx.Document()
+    for line in lines:
+        if line.startswith("# "):
+            document.add_heading(line[2:], level=1)
+        else:
+            document.add_paragraph(line)
+    document.save(path)
+
+
+def write_pdf(path: str, lines: List[str]):
+    """Write a minimal text-only PDF (Helvetica, one line per row)"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    font_id = 3
+    first_page_id = 4
+    kids = " ".join(f"{first_page_id + 2 * i} 0 R" for i in range(len(pages)))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode("ascii"),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+
+    for i, page_lines in enumerate(pages):
+        content_id = first_page_id + 2 * i + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>".encode("ascii")
+        )
+        rows = ["BT", "/F1 10 Tf", "14 TL", "40 760 Td"]
+        for line in page_lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            rows.append(f"({escaped}) Tj T*")
+        rows.append("ET")
+        stream = "\n".join(rows).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    with open(path, "wb") as file:
+        file.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(file.tell())
+            file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = file.tell()
+        file.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            file.write(b"%010d 00000 n \n" % offset)
+        file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def generate_document(directory: str, fmt: str, pages: int, variant: str = "plain", seed: int = 0) -> str:
+    """Write a synthetic document (reusing an existing one) and return its path"""
+    path = os.path.join(directory, f"synthetic_{variant}_{pages}p.{fmt}")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        WRITERS[fmt](path, list(generate_lines(pages, variant, seed)))
+    return path
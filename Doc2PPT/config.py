@@ -1,4 +1,88 @@
 class Config:
     ENABLE_ANALYTICS = True
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
-    ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
\ No newline at end of file
+    UPLOAD_OVERHEAD_BYTES = 64 * 1024  # Multipart headers around the file
+    ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+
+    # Conversion job queue
+    JOB_WORKERS = 2
+    JOB_QUEUE_DEPTH = 50
+    JOB_TIMEOUT = 300  # seconds
+    JOB_MAX_PER_WORKER = 100  # Jobs a worker process runs before it is replaced (bounds leaks)
+
+    # Content-addressed cache of converted presentations
+    CACHE_ENABLED = True
+    CACHE_DIR = 'outputs/cache'
+    CACHE_MAX_BYTES = 500 * 1024 * 1024  # 500MB
+    CACHE_MAX_ENTRIES = 1000
+
+    # PDF extraction
+    PDF_PARALLEL = False  # Opt-in: split large PDFs across a process pool
+    PDF_PARALLEL_MIN_PAGES = 50
+    PDF_PAGES_PER_TASK = 25
+    PDF_WORKERS = None  # Defaults to the number of CPUs
+
+    # Index of uploaded documents
+    UPLOAD_INDEX = 'uploads/index.sqlite3'
+
+    # In-memory cache of parsed template packages
+    TEMPLATE_CACHE_MAX_BYTES = 100 * 1024 * 1024  # 100MB
+
+    # Chart rendering
+    CHART_DPI = 300
+    CHART_FORMAT = 'png'
+    CHART_WORKERS = None  # Defaults to the number of CPUs
+    CHART_PARALLEL_MIN = 4  # Use a process pool from this many uncached charts
+    CHART_CACHE_SIZE = 128
+    TABLE_CHARTS = True  # Chart each table's first numeric column by row label
+    CHART_MAX_BARS = 20  # Tables with more rows are not charted
+
+    # Downloads
+    DOWNLOAD_MAX_AGE = 3600  # seconds
+    USE_X_SENDFILE = False  # Let the fronting proxy send files (X-Sendfile)
+
+    # Build styled slides by cloning prebuilt paragraphs instead of styling each run
+    FAST_SLIDE_BUILDER = True
+
+    # Reuse slides of unchanged sections across revisions of a document
+    LINEAGE_ENABLED = True
+    LINEAGE_DIR = 'outputs/lineage'
+    LINEAGE_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+    LINEAGE_MAX_ENTRIES = 500  # Lineages kept; the least recently used are dropped first
+
+    # Relevance filtering of sections per audience and length
+    AUDIENCE_KEYWORDS = {
+        'executive': ['summary', 'key', 'result', 'conclusion']
+    }
+    LENGTH_BUDGETS = {'short': 5, 'medium': 10, 'long': None}  # Sections kept
+    AUDIENCE_BUDGETS = {'management': 10}
+    RELEVANCE_TITLE_WEIGHT = 3.0  # Score of a keyword hit in a section title
+    RELEVANCE_BODY_WEIGHT = 1.0  # Score of a keyword hit in a section body
+
+    # Async (ASGI) serving mode, see asgi.py
+    ASYNC_WORKERS = 2  # Conversions running at once, one process each
+    ASYNC_QUEUE_DEPTH = 8  # Conversions waiting for a worker before 429
+    ASYNC_MAX_UPLOADS = 32  # Upload bodies received at once before 429
+    ASYNC_RETRY_AFTER = 5  # seconds; Retry-After before any job has finished
+
+    # Tables found in PDF (pdfplumber table finder) and DOCX documents
+    EXTRACT_TABLES = True
+    TABLE_SUMMARY_ROWS = 200  # Larger tables are summarized: a preview plus statistics (None: never)
+    TABLE_PREVIEW_ROWS = 10
+    TABLE_ROWS_PER_SLIDE = 15  # Longer tables continue on further slides
+    TABLE_FONT_SIZE = 12  # Points
+    TABLE_STATS_COLUMNS_PER_SLIDE = 6  # Statistics of wider tables continue on further slides
+
+    # Multi-document merge (main.py --merge, POST /api/convert/merge)
+    MERGE_MAX_DOCUMENTS = 20
+
+    # Batch conversion (POST /api/convert/batch): one job per file, then one zip
+    BATCH_MAX_FILES = 50
+    BATCH_IN_FLIGHT = 2  # Files of one batch in the job queue at once; the rest wait their turn
+
+    # Images embedded in generated decks, and how the .pptx package is written
+    MEDIA_MAX_DPI = 220  # Downscale images beyond this resolution at their displayed size (None: keep)
+    MEDIA_RECOMPRESS = True  # Re-encode images when that makes them smaller
+    MEDIA_PNG_COLORS = 256  # Palette size PNGs are quantized to when recompressed (None: keep true color)
+    MEDIA_JPEG_QUALITY = 85
+    PPTX_COMPRESS_LEVEL = 6  # zlib level 0-9 for XML parts; images are stored, not deflated again
@@ -1,11 +1,20 @@
 import argparse
+import glob
+import json
 import os
 import sys
+import time
 import uuid
-from typing import Optional
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
 from modules.document_parser import DocumentParser
 from modules.pptx_generator import PPTXGenerator
+from modules.conversion_cache import ConversionCache, link_or_copy
+from modules.template_cache import get_template_cache
+from modules.lineage_store import LineageStore
 from utils.logger import setup_logging
+from utils.metrics import PhaseTimer
 from config import Config
 
 def validate_file(file_path: str, file_type: str = "input") -> None:
@@ -15,6 +24,47 @@ def validate_file(file_path: str, file_type: str = "input") -> None:
     if not os.access(file_path, os.R_OK):
         raise PermissionError(f"Cannot read {file_type} file: {file_path}")
 
+_conversion_cache = None
+
+def get_conversion_cache() -> Optional[ConversionCache]:
+    """Return the process-wide conversion cache, or None if caching is disabled."""
+    global _conversion_cache
+    if not Config.CACHE_ENABLED:
+        return None
+    if _conversion_cache is None:
+        _conversion_cache = ConversionCache(
+            Config.CACHE_DIR,
+            max_bytes=Config.CACHE_MAX_BYTES,
+            max_entries=Config.CACHE_MAX_ENTRIES
+        )
+    return _conversion_cache
+
+_lineage_store = None
+
+def get_lineage_store() -> Optional[LineageStore]:
+    """Return the process-wide lineage store, or None if slide reuse is disabled."""
+    global _lineage_store
+    if not Config.LINEAGE_ENABLED:
+        return None
+    if _lineage_store is None:
+        _lineage_store = LineageStore(Config.LINEAGE_DIR, Config.LINEAGE_MAX_BYTES, Config.LINEAGE_MAX_ENTRIES)
+    return _lineage_store
+
+def cache_options(
+    audience_level: str,
+    presentation_length: str,
+    include_summary: bool,
+    include_appendix: bool
+) -> dict:
+    """Options that affect the generated deck and therefore the cache key."""
+    return {
+        "audience": audience_level,
+        "length": presentation_length,
+        "summary": bool(include_summary),
+        "appendix": bool(include_appendix),
+        "analytics": Config.ENABLE_ANALYTICS
+    }
+
 def convert_document(
     input_file: str,
     output_pptx: str,
@@ -22,7 +72,9 @@ def convert_document(
     audience_level: str = "executive",
     presentation_length: str = "medium",
     include_summary: bool = True,
-    include_appendix: bool = False
+    include_appendix: bool = False,
+    use_cache: bool = True,
+    lineage: Optional[str] = None
 ) -> dict:
     """
     Convert a document to PowerPoint with customization options.
@@ -35,51 +87,376 @@ def convert_document(
         presentation_length: Desired presentation length
         include_summary: Whether to include summary slide
         include_appendix: Whether to include appendix
+        use_cache: Whether to reuse a previously generated deck for identical input
+        lineage: Name shared by revisions of the same document; slides of
+                 sections unchanged since the previous revision are reused
 
     Returns:
         Dictionary with conversion results or error information
     """
+    timer = PhaseTimer(format=os.path.splitext(input_file)[-1].lower().lstrip("."))
+
     try:
-        # Validate input files
-        validate_file(input_file, "input")
-        if template:
-            validate_file(template, "template")
-
-        # Parse document with audience and length considerations
-        parser = DocumentParser(input_file)
-        content = parser.extract_content(
-            audience_level=audience_level,
-            content_length=presentation_length
-        )
+        with timer.span("convert"):
+            # Validate input files
+            validate_file(input_file, "input")
+            if template:
+                validate_file(template, "template")
 
-        # Generate presentation with options
-        ppt_generator = PPTXGenerator(output_pptx, template)
-        ppt_generator.generate_presentation(
-            content,
-            include_summary=include_summary,
-            include_appendix=include_appendix,
-            audience_level=audience_level,
-            presentation_length=presentation_length
-        )
+            # Reuse an earlier deck generated from the same bytes and options
+            cache = get_conversion_cache() if use_cache else None
+            if cache:
+                cache_key = cache.make_key(input_file, template, cache_options(
+                    audience_level, presentation_length, include_summary, include_appendix
+                ))
+                cached_path = cache.get(cache_key)
+                if cached_path:
+                    link_or_copy(cached_path, output_pptx)
+                    return {
+                        "success": True,
+                        "output_path": output_pptx,
+                        "message": f"Presentation saved to {output_pptx} (cached)",
+                        "cache_hit": True,
+                        "cache_stats": cache.stats(),
+                        "timings": timer.timings
+                    }
+
+            # Parse the document once; views for audience and length are memoized
+            with timer.span("parse"):
+                document = DocumentParser(input_file).parse()
+            with timer.span("filter"):
+                content = document.view(audience_level, presentation_length)
+
+            # Previous revision of the same lineage, built with the same template and options
+            lineage_store = get_lineage_store() if lineage else None
+            if lineage_store:
+                lineage_key = json.dumps([
+                    get_template_cache().digest(template) if template else None,
+                    cache_options(audience_level, presentation_length, include_summary, include_appendix)
+                ], sort_keys=True)
+                previous = lineage_store.load(lineage, lineage_key)
+
+            # Generate presentation with options
+            with timer.span("generate"):
+                ppt_generator = PPTXGenerator(output_pptx, template)
+                if lineage_store and previous:
+                    ppt_generator.enable_reuse(*previous)
+                ppt_generator.generate_presentation(
+                    content,
+                    include_summary=include_summary,
+                    include_appendix=include_appendix,
+                    audience_level=audience_level,
+                    presentation_length=presentation_length,
+                    save=False,
+                    filter_content=False  # Already filtered by document.view()
+                )
+
+            # Optionally analyze numerical content if needed
+            if Config.ENABLE_ANALYTICS:
+                with timer.span("analytics"):
+                    analyzer = document.analyzer(audience_level, presentation_length)
+                    ppt_generator.add_analytics(analyzer)
+
+            # Save exactly once, after every slide has been added
+            with timer.span("save"):
+                save_stats = ppt_generator.save()
 
-        # Optionally analyze numerical content if needed
-        if Config.ENABLE_ANALYTICS:
-            analyzer = parser.analyze_numerical_content(content)
-            analyzer.add_to_presentation(ppt_generator.presentation)
-            ppt_generator.presentation.save(output_pptx)
+            result = {
+                "success": True,
+                "output_path": output_pptx,
+                "message": f"Presentation saved to {output_pptx}",
+                "timings": timer.timings,
+                "slides_reused": ppt_generator.reuse_stats["reused"],
+                "slides_rebuilt": ppt_generator.reuse_stats["rebuilt"],
+                "output_bytes": save_stats["bytes"],
+                "save_seconds": save_stats["seconds"],
+                "media": save_stats["media"]
+            }
 
+            if lineage_store:
+                lineage_store.save(lineage, output_pptx, lineage_key, ppt_generator.section_slides)
+
+            if cache:
+                cache.put(cache_key, output_pptx)
+                result["cache_hit"] = False
+                result["cache_stats"] = cache.stats()
+
+            return result
+
+    except Exception as e:
         return {
-            "success": True,
-            "output_path": output_pptx,
-            "message": f"Presentation saved to {output_pptx}"
+            "success": False,
+            "error": str(e),
+            "message": f"Conversion failed: {str(e)}",
+            "timings": timer.timings,
+            "failed_phase": timer.failed_phase
         }
 
+def merge_documents(
+    input_files: List[str],
+    output_pptx: str,
+    template: Optional[str] = None,
+    audience_level: str = "executive",
+    presentation_length: str = "medium",
+    include_summary: bool = True,
+    include_appendix: bool = False,
+    titles: Optional[List[str]] = None
+) -> dict:
+    """
+    Convert several documents into one merged PowerPoint deck.
+
+    Documents are parsed one at a time, in order, and each is released
+    before the next is loaded, so peak memory stays close to that of the
+    largest single document. They share the deck's slide limit: each gets
+    an equal share of the slides still free, and slides a short document
+    leaves unused go to the ones after it. Merged decks bypass the
+    conversion cache and slide reuse.
+
+    Args:
+        input_files: Paths of the input documents, in deck order
+        output_pptx: Path for output PowerPoint
+        template: Optional template file path
+        audience_level: Target audience level
+        presentation_length: Desired length of the whole deck
+        include_summary: Whether to include a summary slide listing the documents
+        include_appendix: Whether to include appendix
+        titles: Divider slide title of each document (defaults to the file names)
+
+    Returns:
+        Dictionary with conversion results, per-document slide counts, or error information
+    """
+    timer = PhaseTimer(format="merge")
+
+    try:
+        with timer.span("convert"):
+            if not input_files:
+                raise ValueError("No input documents to merge")
+            for input_file in input_files:
+                validate_file(input_file, "input")
+            if template:
+                validate_file(template, "template")
+
+            with timer.span("generate"):
+                ppt_generator = PPTXGenerator(output_pptx, template)
+                ppt_generator.begin_merge(presentation_length, include_summary, include_appendix)
+
+            documents = []
+            for index, input_file in enumerate(input_files):
+                with timer.span("parse"):
+                    document = DocumentParser(input_file).parse()
+                with timer.span("filter"):
+                    content = document.view(audience_level, presentation_length)
+
+                with timer.span("generate"):
+                    title = titles[index] if titles else os.path.splitext(os.path.basename(input_file))[0]
+                    slides = ppt_generator.add_document(content, title, len(input_files) - index)
+
+                if Config.ENABLE_ANALYTICS and slides:
+                    with timer.span("analytics"):
+                        analyzer = document.analyzer(audience_level, presentation_length)
+                        slides += ppt_generator.add_analytics(analyzer)
+                        del analyzer
+
+                documents.append({"input": input_file, "title": title, "sections": len(content), "slides": slides})
+
+                # Release the parsed document before loading the next one
+                del document, content
+
+            with timer.span("generate"):
+                ppt_generator.finish_merge()
+
+            with timer.span("save"):
+                save_stats = ppt_generator.save()
+
+            return {
+                "success": True,
+                "output_path": output_pptx,
+                "message": f"Merged {len(input_files)} documents into {output_pptx}",
+                "timings": timer.timings,
+                "documents": documents,
+                "output_bytes": save_stats["bytes"],
+                "save_seconds": save_stats["seconds"],
+                "media": save_stats["media"]
+            }
+
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
-            "message": f"Conversion failed: {str(e)}"
+            "message": f"Merge failed: {str(e)}",
+            "timings": timer.timings,
+            "failed_phase": timer.failed_phase
+        }
+
+def archive_decks(decks: List[List[str]], zip_path: str) -> dict:
+    """
+    Collect generated decks in one zip (the last job of a batch).
+
+    Args:
+        decks: [path, name] of each deck; name is its file name inside the zip
+        zip_path: Where to write the zip
+
+    Returns:
+        Dictionary with the zip path and the number of decks in it
+    """
+    tmp_path = f"{zip_path}.{uuid.uuid4().hex}.tmp"
+    names = set()
+    try:
+        # Decks are zip files already, so they are stored rather than deflated again
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for path, name in decks:
+                stem, ext = os.path.splitext(name)
+                unique, number = name, 1
+                while unique in names:
+                    number += 1
+                    unique = f"{stem} ({number}){ext}"
+                names.add(unique)
+                archive.write(path, unique)
+        os.replace(tmp_path, zip_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return {"success": False, "error": str(e), "message": f"Archive failed: {str(e)}"}
+
+    return {"success": True, "zip_path": zip_path, "files": len(decks)}
+
+def init_job_worker():
+    """Warm up a job queue worker once: import the format backends and the analytics stack."""
+    for _, backend in DocumentParser.EXTRACTORS.values():
+        if backend:
+            try:
+                DocumentParser._load_backend(backend)
+            except ImportError:
+                pass  # Reported when a document in that format is converted
+    if Config.ENABLE_ANALYTICS:
+        import modules.data_analyzer
+
+def run_conversion(**kwargs) -> dict:
+    """Job queue target: a batch's zip, a merge, or a single conversion, by the arguments given."""
+    if "decks" in kwargs:
+        return archive_decks(**kwargs)
+    if "input_files" in kwargs:
+        return merge_documents(**kwargs)
+    return convert_document(**kwargs)
+
+def collect_batch_inputs(input_spec: str) -> List[str]:
+    """
+    Resolve a batch input specification to a list of documents.
+
+    Args:
+        input_spec: A directory, a glob pattern, or a manifest file
+                    (JSON list of paths, or one path per line)
+
+    Returns:
+        Sorted list of input paths with supported extensions
+    """
+    if os.path.isdir(input_spec):
+        paths = [os.path.join(input_spec, name) for name in os.listdir(input_spec)]
+    elif glob.has_magic(input_spec):
+        paths = glob.glob(input_spec, recursive=True)
+    elif os.path.isfile(input_spec):
+        base_dir = os.path.dirname(input_spec)
+        with open(input_spec, "r", encoding="utf-8") as manifest:
+            if input_spec.lower().endswith(".json"):
+                entries = json.load(manifest)
+            else:
+                entries = [line.strip() for line in manifest
+                           if line.strip() and not line.lstrip().startswith("#")]
+        paths = [entry if os.path.isabs(entry) else os.path.join(base_dir, entry) for entry in entries]
+    else:
+        raise FileNotFoundError(f"Batch input not found: {input_spec}")
+
+    return sorted(
+        path for path in paths
+        if os.path.isfile(path)
+        and os.path.splitext(path)[-1].lower().lstrip(".") in Config.ALLOWED_EXTENSIONS
+    )
+
+def _init_batch_worker(template: Optional[str] = None):
+    """Warm up a batch worker once so every conversion it runs skips startup costs."""
+    setup_logging()
+    init_job_worker()
+    if template and os.path.exists(template):
+        get_template_cache().load(template)
+
+def _convert_batch_item(input_file: str, output_pptx: str, options: dict) -> dict:
+    """Convert one batch item and time it."""
+    start = time.perf_counter()
+    result = convert_document(input_file, output_pptx, **options)
+    return {
+        "input": input_file,
+        "output": output_pptx if result["success"] else None,
+        "status": "completed" if result["success"] else "failed",
+        "seconds": round(time.perf_counter() - start, 3),
+        "error": result.get("error")
+    }
+
+def run_batch(
+    input_spec: str,
+    output_dir: str,
+    workers: Optional[int] = None,
+    summary_path: Optional[str] = None,
+    **options
+) -> dict:
+    """
+    Convert every document matched by input_spec across a pool of warm worker processes.
+
+    Args:
+        input_spec: Directory, glob pattern or manifest file
+        output_dir: Directory for the generated presentations
+        workers: Number of worker processes (defaults to the CPU count)
+        summary_path: Where to write the JSON summary
+                      (defaults to batch_summary.json in output_dir)
+        **options: Conversion options passed to convert_document
+
+    Returns:
+        Batch summary with per-file timing, status and output path
+    """
+    inputs = collect_batch_inputs(input_spec)
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = summary_path or os.path.join(output_dir, "batch_summary.json")
+
+    # Give each input a unique output name, even when stems collide
+    outputs, used = [], set()
+    for input_file in inputs:
+        stem = os.path.splitext(os.path.basename(input_file))[0]
+        name, counter = f"{stem}.pptx", 1
+        while name in used:
+            name, counter = f"{stem}_{counter}.pptx", counter + 1
+        used.add(name)
+        outputs.append(os.path.join(output_dir, name))
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(options.get("template"),)) as executor:
+        futures = {
+            executor.submit(_convert_batch_item, input_file, output_pptx, options): input_file
+            for input_file, output_pptx in zip(inputs, outputs)
         }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                item = future.result()
+            except Exception as e:
+                item = {"input": futures[future], "output": None, "status": "failed",
+                        "seconds": None, "error": str(e)}
+            results.append(item)
+            print(f"[{done}/{len(inputs)}] {item['status']}: {item['input']}", file=sys.stderr)
+
+    results.sort(key=lambda item: item["input"])
+    summary = {
+        "total": len(results),
+        "completed": sum(1 for item in results if item["status"] == "completed"),
+        "failed": sum(1 for item in results if item["status"] != "completed"),
+        "seconds": round(time.perf_counter() - start, 3),
+        "summary_path": summary_path,
+        "results": results
+    }
+
+    with open(summary_path, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+
+    return summary
 
 def main():
     """Command-line interface for document conversion."""
@@ -92,12 +469,41 @@ def main():
     parser.add_argument(
         "input_file",
         type=str,
-        help="Path to the input document (PDF, DOCX, TXT)"
+        help="Path to the input document (PDF, DOCX, TXT); with --batch or --merge, "
+             "a directory, glob pattern or manifest file"
     )
     parser.add_argument(
         "output_pptx",
         type=str,
-        help="Path to save the generated PowerPoint file"
+        help="Path to save the generated PowerPoint file; with --batch, the output directory"
+    )
+    parser.add_argument(
+        "--lineage",
+        type=str,
+        default=None,
+        help="Name shared by revisions of a document; unchanged sections reuse earlier slides"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Convert many documents across a pool of worker processes"
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Merge every document matched by INPUT (directory, glob pattern or manifest) into one deck"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of batch worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--summary-json",
+        type=str,
+        default=None,
+        help="Where to write the batch summary (default: OUTPUT/batch_summary.json)"
     )
     parser.add_argument(
         "--template",
@@ -134,6 +540,53 @@ def main():
 
     args = parser.parse_args()
 
+    if args.batch:
+        try:
+            summary = run_batch(
+                args.input_file,
+                args.output_pptx,
+                workers=args.workers,
+                summary_path=args.summary_json,
+                template=args.template,
+                audience_level=args.audience,
+                presentation_length=args.length,
+                include_summary=args.include_summary,
+                include_appendix=args.include_appendix
+            )
+        except Exception as e:
+            print(f"Batch conversion failed: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"Converted {summary['completed']}/{summary['total']} documents "
+              f"in {summary['seconds']}s, summary saved to {summary['summary_path']}")
+        sys.exit(0 if summary["failed"] == 0 else 1)
+
+    if args.merge:
+        try:
+            inputs = collect_batch_inputs(args.input_file)
+        except Exception as e:
+            print(f"Merge failed: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+        result = merge_documents(
+            inputs,
+            args.output_pptx,
+            template=args.template,
+            audience_level=args.audience,
+            presentation_length=args.length,
+            include_summary=args.include_summary,
+            include_appendix=args.include_appendix
+        )
+        if not result["success"]:
+            print(result["message"], file=sys.stderr)
+            sys.exit(1)
+
+        print(result["message"])
+        for document in result["documents"]:
+            print(f"  {document['input']}: {document['slides']} slides from {document['sections']} sections")
+        print(f"Output size: {result['output_bytes'] / 1024:.1f} KB, saved in {result['save_seconds']:.3f}s")
+        sys.exit(0)
+
     result = convert_document(
         input_file=args.input_file,
         output_pptx=args.output_pptx,
@@ -141,11 +594,16 @@ def main():
         audience_level=args.audience,
         presentation_length=args.length,
         include_summary=args.include_summary,
-        include_appendix=args.include_appendix
+        include_appendix=args.include_appendix,
+        lineage=args.lineage
     )
 
     if result["success"]:
         print(result["message"])
+        if "output_bytes" in result:
+            print(f"Output size: {result['output_bytes'] / 1024:.1f} KB, saved in {result['save_seconds']:.3f}s")
+        if args.lineage and "slides_reused" in result:
+            print(f"Slides reused: {result['slides_reused']}, rebuilt: {result['slides_rebuilt']}")
         sys.exit(0)
     else:
         print(result["message"], file=sys.stderr)
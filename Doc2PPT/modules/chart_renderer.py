@@ -0,0 +1,176 @@
+# modules/chart_renderer.py - In-memory chart rendering
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from matplotlib.figure import Figure
+from config import Config
+
+
+def render_figure(fig, dpi: int, fmt: str) -> bytes:
+    """Render a matplotlib figure to image bytes"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_chart(spec: Dict, dpi: int, fmt: str) -> bytes:
+    """
+    Render a chart spec to image bytes.
+
+    A spec is a plain dict (so it can be hashed and sent to worker processes):
+    kind ('bar', 'barh', 'line' or 'pie'), labels, values, and optional title,
+    xlabel, ylabel and size (inches).
+    """
+    # Figure() draws through the Agg canvas directly: no pyplot state, no display
+    fig = Figure(figsize=spec.get('size', (7, 5)))
+    ax = fig.add_subplot()
+    kind = spec.get('kind', 'bar')
+    labels, values = spec['labels'], spec['values']
+
+    if kind == 'bar':
+        ax.bar(labels, values)
+    elif kind == 'barh':
+        ax.barh(labels, values)
+    elif kind == 'line':
+        ax.plot(labels, values, marker='o')
+    elif kind == 'pie':
+        ax.pie(values, labels=labels, autopct='%1.1f%%')
+    else:
+        raise ValueError(f"Unsupported chart kind: {kind}")
+
+    ax.set_title(spec.get('title', ''))
+    if spec.get('xlabel'):
+        ax.set_xlabel(spec['xlabel'])
+    if spec.get('ylabel'):
+        ax.set_ylabel(spec['ylabel'])
+
+    return render_figure(fig, dpi, fmt)
+
+
+def _exit_with_parent(parent: int):
+    """
+    Pool initializer: exit once the renderer's process is gone.
+
+    A job worker killed on timeout cannot shut its pool down, and the pool's
+    processes would otherwise wait on their task queue forever.
+    """
+    def watch():
+        while os.getppid() == parent:
+            time.sleep(1.0)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+class ChartRenderer:
+    """
+    Renders charts to in-memory image buffers.
+
+    Chart specs are memoized on their content, DPI and format, and a batch of
+    uncached specs is spread across a process pool once it is large enough
+    to pay for the pool. The pool is started on first use and kept for later
+    batches. Figures built directly with matplotlib are rendered in-process.
+    """
+
+    def __init__(self, dpi: int = 300, fmt: str = 'png', workers: Optional[int] = None,
+                 parallel_min: int = 4, cache_size: int = 128):
+        self.dpi = dpi
+        self.fmt = fmt
+        self.workers = workers
+        self.parallel_min = parallel_min
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def render_figures(self, figures: List) -> List[bytes]:
+        """Render matplotlib figures in order"""
+        return [render_figure(fig, self.dpi, self.fmt) for fig in figures]
+
+    def render_charts(self, specs: List[Dict]) -> List[bytes]:
+        """Render chart specs in order, reusing cached images for identical charts"""
+        keys = [self._key(spec) for spec in specs]
+        images = {}
+        pending = {}
+
+        with self._lock:
+            for key, spec in zip(keys, specs):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    images[key] = self._cache[key]
+                else:
+                    pending.setdefault(key, spec)
+
+        if pending:
+            rendered = self._render_pending(list(pending.values()))
+            images.update(zip(pending, rendered))
+            with self._lock:
+                for key in pending:
+                    self._cache[key] = images[key]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [images[key] for key in keys]
+
+    def _render_pending(self, specs: List[Dict]) -> List[bytes]:
+        if len(specs) < self.parallel_min or self.workers == 1:
+            return [render_chart(spec, self.dpi, self.fmt) for spec in specs]
+
+        executor = self._get_executor()
+        try:
+            return list(executor.map(
+                render_chart, specs, [self.dpi] * len(specs), [self.fmt] * len(specs)
+            ))
+        except BrokenProcessPool:
+            # A pool process died; start a fresh pool next time and render this batch here
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return [render_chart(spec, self.dpi, self.fmt) for spec in specs]
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """The renderer's process pool, started on first use (and again in a forked child)"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_exit_with_parent,
+                                                     initargs=(os.getpid(),))
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def shutdown(self):
+        """Stop the process pool, if one was started"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor and self._executor_pid == os.getpid():
+            executor.shutdown()
+
+    def _key(self, spec: Dict) -> str:
+        payload = json.dumps([spec, self.dpi, self.fmt], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+chart_renderer = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Return the process-wide chart renderer"""
+    global chart_renderer
+    if chart_renderer is None:
+        chart_renderer = ChartRenderer(
+            dpi=Config.CHART_DPI,
+            fmt=Config.CHART_FORMAT,
+            workers=Config.CHART_WORKERS,
+            parallel_min=Config.CHART_PARALLEL_MIN,
+            cache_size=Config.CHART_CACHE_SIZE
+        )
+    return chart_renderer
@@ -0,0 +1,137 @@
+# modules/conversion_cache.py - Content-addressed cache of converted presentations
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str, digest=None):
+    """Feed a file into a hash object in fixed-size chunks"""
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest
+
+
+def link_or_copy(source: str, destination: str):
+    """
+    Hard-link a file into place, falling back to a copy across filesystems.
+
+    Both paths then share one file, so writers must replace either path
+    (write elsewhere and os.replace()) rather than rewrite it in place.
+    """
+    # Renaming over another link to the same file is a no-op that would strand tmp_path
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        return
+    tmp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+class ConversionCache:
+    """
+    Cache of generated decks keyed on the input bytes, template bytes and options.
+
+    Entries are plain files named after their key, so several processes can
+    share one cache directory. The file mtime doubles as the LRU timestamp and
+    is refreshed on every hit; the oldest entries are evicted once the cache
+    grows past its size or entry limits.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 500 * 1024 * 1024, max_entries: int = 1000):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, input_file: str, template: Optional[str] = None, options: Optional[Dict] = None,
+                 content_hash: Optional[str] = None) -> str:
+        """
+        Build a cache key from the document, the template and the conversion options.
+
+        A precomputed SHA-256 of the document (e.g. from the upload registry)
+        can be passed as content_hash to avoid re-reading the file.
+        """
+        document_hash = content_hash or hash_file(input_file).hexdigest()
+        digest = hashlib.sha256(document_hash.encode("ascii"))
+        digest.update(b"\0template\0")
+        if template and os.path.exists(template):
+            hash_file(template, digest)
+        digest.update(b"\0options\0")
+        digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached deck path for a key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)  # Mark as most recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put(self, key: str, pptx_path: str) -> str:
+        """Store a generated deck under a key and evict old entries if needed"""
+        path = self._entry_path(key)
+        link_or_copy(pptx_path, path)
+        self._evict()
+        return path
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache usage"""
+        entries = self._entries()
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pptx")
+
+    def _entries(self):
+        """List cache entries as (mtime, size, path) tuples"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".pptx"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is within bounds"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
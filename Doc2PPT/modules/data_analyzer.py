@@ -1,134 +1,440 @@
 # modules/data_analyzer.py
 import re
+import warnings
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Headless: charts are only ever rendered to buffers
 import matplotlib.pyplot as plt
 from collections import defaultdict
+from typing import Dict, List, Optional
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
 from pptx.util import Inches
-import tempfile
-import os
+from modules.chart_renderer import get_chart_renderer
+from modules.media_store import MediaStore
+from config import Config
+
+# Numbers, percentages, currency values and ranges. Matches never cross a
+# line break so every match can be mapped back to the line it came from.
+NUMBER_PATTERN = re.compile(r"""
+    (?<![\w.])                                      # Not inside a word or number
+    (?P<currency>[$€£¥])?[ \t]?
+    (?P<value>-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|-?\.\d+)
+    (?P<scale>[ \t]?(?i:thousand|million|billion|trillion)\b|(?:k|K|M|bn|B)\b)?
+    [ \t]?(?P<percent>%)?
+    (?:[ \t]?[-–][ \t]?[$€£¥]?[ \t]?                 # Range separator
+    (?P<range_end>-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)
+    (?P<range_scale>[ \t]?(?i:thousand|million|billion|trillion)\b|(?:k|K|M|bn|B)\b)?
+    [ \t]?(?P<range_percent>%)?)?
+    (?!\w|\.\d)                                     # Not followed by more of a token
+""", re.VERBOSE)
+
+SCALE_FACTORS = {
+    'thousand': 1e3, 'k': 1e3,
+    'million': 1e6, 'm': 1e6,
+    'billion': 1e9, 'bn': 1e9, 'b': 1e9,
+    'trillion': 1e12
+}
+
+NUMERIC_COLUMNS = ['section', 'value', 'range_end', 'unit', 'kind', 'context']
+
+# Table cells: thousands separators, currency and percent signs around a number
+TABLE_NUMBER_NOISE = r"[,\s$€£¥%]"
+TABLE_UNIT = r"([$€£¥%])"  # Shown in the column header once stripped from the cells
+TABLE_NEGATIVE = r"^\((.+)\)$"  # Accounting style: (1,234) is -1234
+TABLE_NUMERIC_SHARE = 0.8  # Share of filled cells that must parse for a numeric column
+TABLE_STATS = ('count', 'mean', 'std', 'min', 'p25', 'median', 'p75', 'max')
+
+# DrawingML of one table cell, as python-pptx writes it; text goes between start and end
+TABLE_CELL_START = '<a:tc><a:txBody><a:bodyPr/><a:lstStyle/><a:p>{bold}<a:r><a:rPr sz="{size}"/><a:t>'
+TABLE_CELL_END = '</a:t></a:r></a:p></a:txBody><a:tcPr/></a:tc>'
+TABLE_EMPTY_CELL = '<a:tc><a:txBody><a:bodyPr/><a:lstStyle/><a:p>{bold}</a:p></a:txBody><a:tcPr/></a:tc>'
+TABLE_BOLD = '<a:pPr><a:defRPr b="1"/></a:pPr>'
+
 
 class DataAnalyzer:
     # [Previous methods remain the same until add_to_presentation]
     def __init__(self):
         self.numeric_data = defaultdict(list)
+        self.numeric_frame = pd.DataFrame(columns=NUMERIC_COLUMNS)
         self.tables = []
         self.figures = []
+        self.charts = []
 
     def extract_and_analyze(self, content):
         """Main method to extract and analyze numerical data"""
         self._extract_numerical_data(content)
 
     def _extract_numerical_data(self, content):
-        """Extract numerical data from document content"""
-        num_pattern = r"""
-            (?:^|\s)                         # Start of string or whitespace
-            (?:\$?\s*-?\d{1,3}(?:,\d{3})*   # Numbers with commas
-            (?:\.\d+)?\s*%?                  # Decimals and percentages
-            |\.\d+\s*%?)                     # Decimal numbers
-            (?:\s*[-–]\s*                    # Range separator
-            \$?\s*-?\d{1,3}(?:,\d{3})*      # Second number in range
-            (?:\.\d+)?\s*%?)?                # Optional decimal/percentage
-            (?=\s|$|[^\w.-])                 # Lookahead for boundary
         """
+        Extract numerical data from document content in a single pass.
+
+        All lines are joined into one buffer and scanned once with the
+        precompiled pattern; match offsets are mapped back to lines and
+        sections with a binary search, and values are parsed and scaled as
+        whole columns.
+        """
+        titles = [section['title'] for section in content]
+        counts = np.fromiter((len(section['content']) for section in content), dtype=np.int64, count=len(content))
+        lines = [line for section in content for line in section['content']]
+        if not lines:
+            return
+
+        # Offset of each line in the joined buffer (+1 for the separator)
+        lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+        line_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        line_sections = np.repeat(np.arange(len(content)), counts)
+
+        starts, groups = [], []
+        for match in NUMBER_PATTERN.finditer("\n".join(lines)):
+            starts.append(match.start())
+            groups.append(match.groups())
+        if not groups:
+            return
+
+        matches = pd.DataFrame(groups, columns=list(NUMBER_PATTERN.groupindex))
+        line_idx = np.searchsorted(line_starts, np.asarray(starts), side='right') - 1
+
+        scale = self._scale_factors(matches['scale'])
+        range_scale = self._scale_factors(matches['range_scale']).where(matches['range_scale'].notna(), scale)
+        values = pd.to_numeric(matches['value'].str.replace(',', '', regex=False)) * scale
+        range_ends = pd.to_numeric(matches['range_end'].str.replace(',', '', regex=False)) * range_scale
+
+        is_percent = matches['percent'].notna() | matches['range_percent'].notna()
+        is_currency = matches['currency'].notna()
+        kind = np.where(is_currency, 'currency', np.where(is_percent, 'percentage', 'number'))
+        unit = np.where(is_currency, matches['currency'].fillna(''), np.where(is_percent, '%', ''))
+
+        section_idx = line_sections[line_idx]
+        frame = pd.DataFrame({
+            'section': np.asarray(titles, dtype=object)[section_idx],
+            'value': values.to_numpy(),
+            'range_end': range_ends.to_numpy(),
+            'unit': unit,
+            'kind': kind,
+            'context': np.asarray(lines, dtype=object)[line_idx]
+        }, columns=NUMERIC_COLUMNS)
+        self.numeric_frame = frame
+
+        # Matches arrive in document order, so each section is a contiguous slice
+        columns = {
+            'values': frame['value'].tolist(),
+            'range_ends': frame['range_end'].astype(object).where(frame['range_end'].notna(), None).tolist(),
+            'units': frame['unit'].tolist(),
+            'kinds': frame['kind'].tolist(),
+            'context': frame['context'].tolist()
+        }
+        present = np.unique(section_idx)
+        bounds = np.searchsorted(section_idx, present)
+        for idx, start, stop in zip(present, bounds, np.append(bounds[1:], len(section_idx))):
+            title = titles[idx]
+            section_data = self.numeric_data.get(title) or {'title': title, **{key: [] for key in columns}}
+            for key, values in columns.items():
+                section_data[key].extend(values[start:stop])
+            self.numeric_data[title] = section_data
+
+    @staticmethod
+    def _scale_factors(scales: pd.Series) -> pd.Series:
+        """Multiplier for each captured scale word (1 where none was given)"""
+        normalized = scales.str.strip().str.lower()
+        return normalized.map(SCALE_FACTORS).fillna(1.0)
+
+    @staticmethod
+    def build_table(title: str, rows: List[List[str]], **meta) -> Dict:
+        """
+        Turn extracted table rows into {'title', 'data', 'stats', 'row_count', 'summarized'}.
+
+        The first row is the header unless it looks like data. Columns whose
+        filled cells are mostly numbers become numeric; statistics cover
+        those. Tables longer than TABLE_SUMMARY_ROWS are marked summarized:
+        they are presented as a preview and their statistics.
+        """
+        frame = DataAnalyzer._table_frame(rows)
+        return {
+            'title': title,
+            'data': frame,
+            'stats': DataAnalyzer._table_stats(frame),
+            'row_count': len(frame),
+            'summarized': Config.TABLE_SUMMARY_ROWS is not None and len(frame) > Config.TABLE_SUMMARY_ROWS,
+            **meta
+        }
+
+    @staticmethod
+    def _table_frame(rows: List[List[str]]) -> pd.DataFrame:
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+
+        # A header row is fully filled and less numeric than the row under it
+        header = rows[0]
+        numeric_cells = pd.to_numeric(
+            pd.Series(rows[0] + rows[1]).str.replace(TABLE_NUMBER_NOISE, '', regex=True), errors='coerce'
+        ).notna().to_numpy().reshape(2, width).sum(axis=1)
+        if all(header) and (numeric_cells[0] == 0 or numeric_cells[0] < numeric_cells[1]):
+            columns, body = DataAnalyzer._unique_names(header), rows[1:]
+        else:
+            columns, body = [f"Column {i + 1}" for i in range(width)], rows
+
+        frame = pd.DataFrame(body, columns=columns, dtype=object)
+        cleaned = frame.replace(TABLE_NUMBER_NOISE, '', regex=True).replace(TABLE_NEGATIVE, r'-\1', regex=True)
+        numbers = cleaned.apply(pd.to_numeric, errors='coerce')
+
+        filled = frame != ''
+        parsed_share = numbers.notna().sum() / filled.sum().replace(0, np.nan)
 
-        for section in content:
-            section_data = {
-                'title': section['title'],
-                'values': [],
-                'units': [],
-                'context': []
+        # A numeric column keeps its unit in the header; mixed units ($ and €) stay text
+        numeric_columns, headers = [], {}
+        for name in parsed_share.index[parsed_share >= TABLE_NUMERIC_SHARE]:
+            units = frame[name].str.extract(TABLE_UNIT, expand=False).dropna().unique()
+            if len(units) > 1:
+                continue
+            numeric_columns.append(name)
+            if len(units) and units[0] not in str(name):
+                headers[name] = f"{name} ({units[0]})"
+
+        frame[numeric_columns] = numbers[numeric_columns]
+        return frame.rename(columns=headers)
+
+    @staticmethod
+    def _unique_names(names: List[str]) -> List[str]:
+        seen = defaultdict(int)
+        unique = []
+        for name in names:
+            seen[name] += 1
+            unique.append(name if seen[name] == 1 else f"{name} {seen[name]}")
+        return unique
+
+    @staticmethod
+    def _table_stats(frame: pd.DataFrame) -> Dict[str, float]:
+        """Per-column statistics of the numeric columns, computed across all columns at once"""
+        numeric = frame.select_dtypes(include='number')
+        if numeric.empty:
+            return {}
+
+        values = numeric.to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns and single values
+            p25, median, p75 = np.nanpercentile(values, [25, 50, 75], axis=0)
+            columns = {
+                'count': (~np.isnan(values)).sum(axis=0),
+                'mean': np.nanmean(values, axis=0),
+                'std': np.nanstd(values, axis=0, ddof=1),
+                'min': np.nanmin(values, axis=0),
+                'p25': p25,
+                'median': median,
+                'p75': p75,
+                'max': np.nanmax(values, axis=0)
             }
 
-            for line in section['content']:
-                matches = re.finditer(num_pattern, line, re.VERBOSE)
-                for match in matches:
-                    value_str = match.group().strip()
-
-            if section_data['values']:
-                self.numeric_data[section['title']] = section_data
-
-    def add_to_presentation(self, presentation):
-        """Add analysis results to PowerPoint presentation"""
-        # Create temp directory for images
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save all figures as PNG images
-            img_paths = []
-            for i, fig in enumerate(self.figures):
-                img_path = os.path.join(temp_dir, f"plot_{i}.png")
-                fig.savefig(img_path, dpi=300, bbox_inches='tight')
-                img_paths.append(img_path)
-                plt.close(fig)
-
-            # Add tables first
-            self._add_tables_to_presentation(presentation)
-
-            # Add images to slides
-            for i, img_path in enumerate(img_paths):
-                slide = presentation.slides.add_slide(presentation.slide_layouts[5])  # Title only
-                slide.shapes.title.text = f"Data Visualization {i+1}"
-
-                # Add image to slide (centered)
-                left = (presentation.slide_width - Inches(7)) // 2
-                slide.shapes.add_picture(
-                    img_path,
-                    left, Inches(1.5),
-                    width=Inches(7),
-                    height=Inches(5)
-                )
+        stats = {}
+        for i, name in enumerate(numeric.columns):
+            for metric in TABLE_STATS:
+                value = columns[metric][i]
+                stats[f"{name}_{metric}"] = int(value) if metric == 'count' else float(value)
+        return stats
 
-    def _add_tables_to_presentation(self, presentation):
-        """Helper method to add tables to slides"""
+    def chart_tables(self):
+        """Queue a bar chart of the first numeric column of each table short enough to chart"""
         for table in self.tables:
-            # Add data table slide
-            slide = presentation.slides.add_slide(presentation.slide_layouts[5])
-            title = slide.shapes.title
-            title.text = table['title']
-
-            # Create table
-            rows = len(table['data']) + 1  # +1 for header
-            cols = len(table['data'].columns)
-            left, top = Inches(0.5), Inches(1.5)
-            width, height = Inches(9), Inches(0.3 * rows)
-
-            pptx_table = slide.shapes.add_table(
-                rows, cols, left, top, width, height
-            ).table
-
-            # Add headers
-            for col_idx, col_name in enumerate(table['data'].columns):
-                cell = pptx_table.cell(0, col_idx)
-                cell.text = str(col_name)
-                cell.text_frame.paragraphs[0].font.bold = True
-
-            # Add data rows
-            for row_idx, (_, row) in enumerate(table['data'].iterrows(), 1):
-                for col_idx, col_name in enumerate(table['data'].columns):
-                    pptx_table.cell(row_idx, col_idx).text = str(row[col_name])
-
-            # Add statistics slide
-            self._add_stats_slide(presentation, table)
-
-    def _add_stats_slide(self, presentation, table):
-        """Add statistics summary slide"""
+            data = table['data']
+            numeric = data.select_dtypes(include='number').columns
+            if table.get('summarized') or not len(numeric) or not 2 <= len(data) <= Config.CHART_MAX_BARS:
+                continue
+
+            # Bars are labeled by the first text column, or by row number without one
+            values = data[numeric[0]].dropna()
+            text = data.columns.difference(numeric, sort=False)
+            labels = data.loc[values.index, text[0]].astype(str) if len(text) else values.index + 1
+            self.add_chart('bar', self._unique_names([str(label) for label in labels]), values.tolist(),
+                           title=f"{table['title']}: {numeric[0]}", ylabel=str(numeric[0]))
+
+    def add_chart(self, kind: str, labels: List, values: List, title: str = '',
+                  xlabel: Optional[str] = None, ylabel: Optional[str] = None):
+        """Queue a chart; it is rendered (and memoized) when added to a presentation"""
+        spec: Dict = {'kind': kind, 'labels': list(labels), 'values': list(values), 'title': title}
+        if xlabel:
+            spec['xlabel'] = xlabel
+        if ylabel:
+            spec['ylabel'] = ylabel
+        self.charts.append(spec)
+
+    def add_to_presentation(self, presentation, media: Optional[MediaStore] = None,
+                            max_slides: Optional[int] = None) -> int:
+        """
+        Add analysis results to PowerPoint presentation; return the slides added.
+
+        Pass the generator's MediaStore so images also shown elsewhere in the
+        deck are stored once. max_slides bounds the slides added (None: no
+        limit): tables that do not fit are summarized, and what is left over
+        after that is dropped.
+        """
+        media = media or MediaStore.from_config(presentation)
+
+        # Add tables first
+        added = self._add_tables_to_presentation(presentation, max_slides)
+
+        # Render the charts that still fit to in-memory buffers; no temp files
+        free = None if max_slides is None else max(max_slides - added, 0)
+        figures = self.figures[:free]
+        charts = self.charts[:None if free is None else free - len(figures)]
+        renderer = get_chart_renderer()
+        images = renderer.render_figures(figures) + renderer.render_charts(charts)
+        for fig in self.figures:
+            plt.close(fig)
+
+        # Add images to slides
+        for i, image in enumerate(images):
+            slide = presentation.slides.add_slide(presentation.slide_layouts[5])  # Title only
+            slide.shapes.title.text = f"Data Visualization {i+1}"
+
+            # Add image to slide (centered)
+            left = (presentation.slide_width - Inches(7)) // 2
+            media.add_picture(
+                slide, image,
+                left, Inches(1.5),
+                width=Inches(7),
+                height=Inches(5)
+            )
+        return added + len(images)
+
+    def _add_tables_to_presentation(self, presentation, max_slides: Optional[int] = None) -> int:
+        """
+        Add each table across slides of up to TABLE_ROWS_PER_SLIDE rows, then its statistics.
+
+        A table whose pages and statistics do not fit in the max_slides left
+        is summarized like a large one. Returns the slides added.
+        """
+        per_slide = Config.TABLE_ROWS_PER_SLIDE
+        added = 0
+        for table in self.tables:
+            free = None if max_slides is None else max_slides - added
+            if free is not None and free < 1:
+                break
+
+            # Large tables are summarized: a preview of their first rows
+            data = table['data']
+            caption = table['title']
+            pages = -(-max(len(data), 1) // per_slide)
+            stats_pages = self._stats_pages(table)
+            if table.get('summarized') or (free is not None and pages + stats_pages > free):
+                data = data.head(Config.TABLE_PREVIEW_ROWS)
+                if len(data) < table['row_count']:
+                    caption = f"{caption} (first {len(data)} of {table['row_count']} rows)"
+
+            # Format and escape every cell once, column by column
+            header = self._escape_cells(pd.Series([str(name) for name in data.columns], dtype=object))
+            body = np.column_stack([
+                self._escape_cells(self._format_column(data[name])) for name in data.columns
+            ]) if len(data) else np.empty((0, len(data.columns)), dtype=object)
+
+            starts = range(0, max(len(body), 1), per_slide)
+            for start in starts[:free]:
+                stop = min(start + per_slide, len(body))
+                title = caption if len(starts) == 1 else f"{caption} (rows {start + 1}-{stop} of {len(body)})"
+                self._add_table_slide(presentation, title, header, body[start:stop])
+                added += 1
+
+            # Add statistics slides
+            if stats_pages:
+                added += self._add_stats_slides(
+                    presentation, table, None if max_slides is None else max_slides - added
+                )
+        return added
+
+    def _add_table_slide(self, presentation, title: str, header: np.ndarray, body: np.ndarray):
+        """One table slide; the cell XML of all rows is written in a single parse"""
         slide = presentation.slides.add_slide(presentation.slide_layouts[5])
-        slide.shapes.title.text = f"Statistics: {table['title']}"
+        slide.shapes.title.text = title
+
+        # Start from a one-row table (python-pptx sets up columns and style) and swap in the filled rows
+        rows, cols = len(body) + 1, len(header)  # +1 for header
+        left, top = Inches(0.5), Inches(1.5)
+        width, row_height = Inches(9), Inches(0.3)
+        frame = slide.shapes.add_table(1, cols, left, top, width, row_height)
+        frame.height = row_height * rows
+        tbl = frame.table._tbl
+        tbl.remove(tbl.tr_lst[0])
+
+        size = Config.TABLE_FONT_SIZE * 100
+        xml = [f'<a:tr h="{row_height}">{"".join(row)}</a:tr>' for row in (
+            self._cell_xml(header[np.newaxis], TABLE_BOLD, size)[0],
+            *self._cell_xml(body, '', size)
+        )]
+
+        for tr in list(parse_xml(f'<a:tbl {nsdecls("a")}>{"".join(xml)}</a:tbl>')):
+            tbl.append(tr)
+
+    @staticmethod
+    def _cell_xml(cells: np.ndarray, bold: str, size: int) -> np.ndarray:
+        """Cell XML for a 2-D array of escaped text, built element-wise"""
+        if not cells.size:
+            return cells
+        return np.where(cells == '', TABLE_EMPTY_CELL.format(bold=bold),
+                        TABLE_CELL_START.format(bold=bold, size=size) + cells + TABLE_CELL_END)
+
+    @staticmethod
+    def _format_column(column: pd.Series) -> pd.Series:
+        """Cell text of a column, with a number format chosen from its dtype"""
+        if pd.api.types.is_bool_dtype(column):
+            text = column.astype(str)
+        elif pd.api.types.is_integer_dtype(column):
+            text = column.map('{:,}'.format, na_action='ignore')
+        elif pd.api.types.is_float_dtype(column):
+            valid = column.dropna()
+            integral = len(valid) and (valid == valid.round()).all() and valid.abs().max() < 1e15
+            text = column.map(('{:,.0f}' if integral else '{:,.2f}').format, na_action='ignore')
+        elif pd.api.types.is_datetime64_any_dtype(column):
+            text = column.dt.strftime('%Y-%m-%d')
+        else:
+            text = column.map(str, na_action='ignore')
+        return text.astype(object).where(column.notna(), '')
+
+    @staticmethod
+    def _escape_cells(text: pd.Series) -> np.ndarray:
+        """XML-escape cell text; control characters become spaces"""
+        return (text.astype(str)
+                .str.replace('&', '&amp;', regex=False)
+                .str.replace('<', '&lt;', regex=False)
+                .str.replace('>', '&gt;', regex=False)
+                .str.replace(r'[\x00-\x1f\x7f]', ' ', regex=True)
+                .to_numpy(dtype=object))
 
-        # Create stats table
+    @staticmethod
+    def _stats_columns(table) -> List[str]:
+        """Numeric columns covered by the table's statistics, in table order"""
+        return [name for name in table['data'].columns if f"{name}_count" in table['stats']]
+
+    def _stats_pages(self, table) -> int:
+        """Slides the statistics take: up to TABLE_STATS_COLUMNS_PER_SLIDE columns each"""
+        return -(-len(self._stats_columns(table)) // Config.TABLE_STATS_COLUMNS_PER_SLIDE)
+
+    def _add_stats_slides(self, presentation, table, max_slides: Optional[int] = None) -> int:
+        """
+        Add the statistics as a metrics x columns matrix; wide tables continue on further slides.
+
+        Returns the slides added (at most max_slides).
+        """
+        columns = self._stats_columns(table)
         stats = table['stats']
-        rows = len(stats) + 1
-        left, top = Inches(2), Inches(1.5)
-        width, height = Inches(4), Inches(0.3 * rows)
-
-        pptx_table = slide.shapes.add_table(
-            rows, 2, left, top, width, height
-        ).table
-
-        # Add headers
-        pptx_table.cell(0, 0).text = "Metric"
-        pptx_table.cell(0, 1).text = "Value"
-
-        # Add stats rows
-        for row_idx, (stat, val) in enumerate(stats.items(), 1):
-            pptx_table.cell(row_idx, 0).text = stat.replace('_', ' ').title()
-            pptx_table.cell(row_idx, 1).text = f"{val:.2f}" if isinstance(val, (float, np.floating)) else str(val)
\ No newline at end of file
+        header = self._escape_cells(pd.Series(['Metric'] + [str(name) for name in columns], dtype=object))
+        cells = [[metric.title() for metric in TABLE_STATS]] + [
+            [self._format_stat(metric, stats[f"{name}_{metric}"]) for metric in TABLE_STATS] for name in columns
+        ]
+        body = np.column_stack([self._escape_cells(pd.Series(column, dtype=object)) for column in cells])
+
+        per_slide = Config.TABLE_STATS_COLUMNS_PER_SLIDE
+        starts = range(0, len(columns), per_slide)
+        for start in starts[:max_slides]:
+            stop = min(start + per_slide, len(columns))
+            title = f"Statistics: {table['title']}"
+            if len(starts) > 1:
+                title = f"{title} (columns {start + 1}-{stop} of {len(columns)})"
+            selected = [0, *range(start + 1, stop + 1)]  # The metric names, then this slide's columns
+            self._add_table_slide(presentation, title, header[selected], body[:, selected])
+        return len(starts[:max_slides])
+
+    @staticmethod
+    def _format_stat(metric: str, value) -> str:
+        if metric == 'count':
+            return str(value)
+        return '' if np.isnan(value) else f"{value:.2f}"
@@ -0,0 +1,182 @@
+# modules/document_model.py - Compact in-memory representation of parsed documents
+import io
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Union
+
+
+class Document(Sequence):
+    """
+    Parsed sections stored as one shared text buffer.
+
+    Every content line lives in a single string, located by an array of
+    offsets; sections are ranges of line indices. This replaces a dict and a
+    list per section and a str object per line. Indexing yields Section
+    views which behave like the read-only {'title': ..., 'content': [...]}
+    dicts the rest of the pipeline expects.
+    """
+
+    __slots__ = ("buffer", "_line_offsets", "_section_starts", "_titles")
+
+    def __init__(self, buffer: str, line_offsets: array, section_starts: array, titles: List[str]):
+        self.buffer = buffer
+        self._line_offsets = line_offsets  # Start of each line, plus the end sentinel
+        self._section_starts = section_starts  # First line of each section, plus the end sentinel
+        self._titles = titles
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [Section(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("section index out of range")
+        return Section(self, index)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._line_offsets) - 1
+
+    def line(self, index: int) -> str:
+        """Text of a line, by its index in the whole document"""
+        return self.buffer[self._line_offsets[index]:self._line_offsets[index + 1] - 1]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, Document)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"<Document sections={len(self)} lines={self.line_count}>"
+
+
+class SectionLines(Sequence):
+    """Read-only list of the content lines of one section"""
+
+    __slots__ = ("_document", "_start", "_stop")
+
+    def __init__(self, document: Document, start: int, stop: int):
+        self._document = document
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._document.line(self._start + i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._document.line(self._start + index)
+
+    def __iter__(self):
+        buffer, offsets = self._document.buffer, self._document._line_offsets
+        for i in range(self._start, self._stop):
+            yield buffer[offsets[i]:offsets[i + 1] - 1]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, SectionLines)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class Section(Mapping):
+    """One section of a Document, readable as {'title': str, 'content': [str, ...]}"""
+
+    __slots__ = ("_document", "_index")
+    _KEYS = ("title", "content")
+
+    def __init__(self, document: Document, index: int):
+        self._document = document
+        self._index = index
+
+    def __getitem__(self, key: str):
+        if key == "title":
+            return self.title
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    @property
+    def title(self) -> str:
+        return self._document._titles[self._index]
+
+    @property
+    def content(self) -> SectionLines:
+        starts = self._document._section_starts
+        return SectionLines(self._document, starts[self._index], starts[self._index + 1])
+
+    @property
+    def text(self) -> str:
+        """Content lines joined with newlines, sliced straight from the buffer"""
+        starts, offsets = self._document._section_starts, self._document._line_offsets
+        start, stop = starts[self._index], starts[self._index + 1]
+        if start == stop:
+            return ""
+        return self._document.buffer[offsets[start]:offsets[stop] - 1]
+
+    def __repr__(self) -> str:
+        return f"<Section {self.title!r} lines={len(self.content)}>"
+
+
+def section_text(section: Dict) -> str:
+    """Content of a section as one newline-joined string"""
+    if isinstance(section, Section):
+        return section.text
+    return "\n".join(section["content"])
+
+
+class DocumentBuilder:
+    """Accumulates sections and lines into a Document without keeping per-line objects"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._size = 0
+        self._line_offsets = array("q", [0])
+        self._section_starts = array("q")
+        self._titles = []
+        self._keep_empty = True
+
+    def add_section(self, title: str, keep_empty: bool = True):
+        """Start a new section; with keep_empty=False it is dropped if no lines follow"""
+        self._drop_empty_section()
+        self._titles.append(title)
+        self._section_starts.append(len(self._line_offsets) - 1)
+        self._keep_empty = keep_empty
+
+    def add_line(self, line: str):
+        self._buffer.write(line)
+        self._buffer.write("\n")
+        self._size += len(line) + 1
+        self._line_offsets.append(self._size)
+
+    def build(self) -> Document:
+        self._drop_empty_section()
+        self._section_starts.append(len(self._line_offsets) - 1)
+        document = Document(self._buffer.getvalue(), self._line_offsets, self._section_starts, self._titles)
+        self._buffer.close()
+        return document
+
+    def _drop_empty_section(self):
+        if self._titles and not self._keep_empty and self._section_starts[-1] == len(self._line_offsets) - 1:
+            self._titles.pop()
+            self._section_starts.pop()
@@ -1,118 +1,466 @@
+import codecs
+import importlib
+import mmap
 import os
-import docx
-import pdfplumber
-from typing import List, Dict
-from modules.data_analyzer import DataAnalyzer
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from itertools import chain
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+from config import Config
+from modules.document_model import Document, DocumentBuilder
+from modules.relevance_filter import RelevanceFilter, get_relevance_filter
+
+# Format backends (pdfplumber) and the analytics stack (pandas, numpy,
+# matplotlib) are imported on first use so a plain-text conversion never
+# pays for them.
+if TYPE_CHECKING:
+    from modules.data_analyzer import DataAnalyzer
+
+
+def _extract_pdf_page_range(filepath: str, start: int, stop: int,
+                            tables: bool = False) -> List[Tuple[str, List]]:
+    """Extract the text and, optionally, the tables of pages [start, stop) in a worker process"""
+    import pdfplumber
+
+    with pdfplumber.open(filepath) as pdf:
+        pages = []
+        for page in pdf.pages[start:stop]:
+            pages.append((page.extract_text() or "", page.extract_tables() if tables else []))
+            page.close()
+        return pages
+
+
+TXT_SAMPLE_BYTES = 64 * 1024  # Read to detect the encoding of a text file
+TXT_CHUNK_BYTES = 1024 * 1024  # Decoded at a time while streaming a text file
+
+# Checked in order: the UTF-32 LE mark starts with the UTF-16 LE one
+TXT_BOMS = ((codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"), (codecs.BOM_UTF8, "utf-8-sig"),
+            (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _detect_encoding(sample: bytes) -> str:
+    """
+    Guess the encoding of a text file from its first bytes.
+
+    A byte order mark wins; otherwise NUL bytes in every other position mean
+    UTF-16 without a mark. Text that decodes as UTF-8 is UTF-8, anything
+    else is taken as Windows-1252, or Latin-1 when it uses the few bytes
+    Windows-1252 leaves undefined.
+    """
+    for bom, encoding in TXT_BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    half = len(sample) // 2
+    if half:
+        even, odd = sample[0::2].count(0), sample[1::2].count(0)
+        if odd > half * 0.3 and even < half * 0.05:
+            return "utf-16-le"
+        if even > half * 0.3 and odd < half * 0.05:
+            return "utf-16-be"
+
+    try:
+        # final=False: a character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _iter_text_chunks(filepath: str, encoding: Optional[str] = None) -> Iterator[List[str]]:
+    """
+    Stream the lines of a text file through a memory map, a chunk at a time.
+
+    The file is decoded TXT_CHUNK_BYTES at a time, so memory stays flat
+    whatever its size; each chunk's complete lines come as one list (chain
+    them to iterate lines). Line breaks are universal, as in text-mode
+    open(); undecodable bytes become U+FFFD instead of failing the file.
+    """
+    with open(filepath, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            encoding = encoding or _detect_encoding(data[:TXT_SAMPLE_BYTES])
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            tail = ""
+            for start in range(0, len(data), TXT_CHUNK_BYTES):
+                stop = start + TXT_CHUNK_BYTES
+                text = tail + decoder.decode(data[start:stop], final=stop >= len(data))
+                if "\r" in text:
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                lines = text.split("\n")
+                tail = lines.pop()  # Unfinished until the next chunk
+                yield lines
+            if tail:
+                yield [tail]
+
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY, W_P, W_TBL, W_TR, W_TC = (W_NS + tag for tag in ("body", "p", "tbl", "tr", "tc"))
+W_RUN, W_HYPERLINK = W_NS + "r", W_NS + "hyperlink"
+W_STYLE, W_STYLE_ID, W_VAL = W_NS + "pStyle", W_NS + "styleId", W_NS + "val"
+W_BREAK_TYPE = W_NS + "type"
+
+# Run elements that contribute to paragraph text, as in python-docx
+W_TEXT = {W_NS + "t": None, W_NS + "tab": "\t", W_NS + "ptab": "\t", W_NS + "cr": "\n", W_NS + "br": "\n",
+          W_NS + "noBreakHyphen": "-"}
+
+
+def _docx_heading_styles(package: zipfile.ZipFile) -> set:
+    """Ids of the paragraph styles named 'Heading ...' in a DOCX package"""
+    try:
+        root = ET.fromstring(package.read("word/styles.xml"))
+    except KeyError:
+        return set()
+    heading_ids = set()
+    for style in root.iter(W_NS + "style"):
+        name = style.find(W_NS + "name")
+        if name is not None and name.get(W_VAL, "").lower().startswith("heading"):
+            heading_ids.add(style.get(W_STYLE_ID))
+    return heading_ids
+
+
+def _docx_text(paragraph) -> str:
+    """
+    Text of a paragraph from its runs and hyperlinks, as python-docx reads it.
+
+    Only the paragraph's own runs count: text boxes and other drawings
+    anchored in a run hold paragraphs of their own, which are left out.
+    """
+    parts = []
+    for child in paragraph:
+        if child.tag == W_RUN:
+            runs = (child,)
+        elif child.tag == W_HYPERLINK:
+            runs = child.iterfind(W_RUN)
+        else:
+            continue
+        for run in runs:
+            for item in run:
+                if item.tag not in W_TEXT:
+                    continue
+                if item.tag == W_NS + "t":
+                    parts.append(item.text or "")
+                elif item.tag != W_NS + "br" or item.get(W_BREAK_TYPE, "textWrapping") == "textWrapping":
+                    parts.append(W_TEXT[item.tag])
+    return "".join(parts)
+
+
+def _docx_cell_text(cell) -> str:
+    """Text of a table cell's paragraphs; a nested table is flattened into the cell"""
+    parts = []
+    for child in cell:
+        if child.tag == W_P:
+            parts.append(_docx_text(child))
+        elif child.tag == W_TBL:
+            parts.extend(text for row in _docx_table_cells(child) for text in row)
+    return " ".join(parts).strip()
+
+
+def _docx_table_cells(table) -> List[List[str]]:
+    """Cell text of each table row"""
+    return [[_docx_cell_text(cell) for cell in row.iterfind(W_TC)] for row in table.iterfind(W_TR)]
+
+
+class ParsedDocument:
+    """
+    Raw extraction of a document, parsed once per conversion.
+
+    Audience/length views, numeric analysis, tables and stats are computed
+    on first use and memoized. Sections are a compact Document and views are lists of
+    its read-only Section objects, shared between callers.
+
+    It keeps no reference to its DocumentParser (which memoizes it), so
+    dropping the last reference frees it at once, without waiting for the
+    cyclic garbage collector.
+    """
+
+    def __init__(self, sections: Document, relevance_filter: RelevanceFilter, raw_tables: List[Dict]):
+        self.sections = sections
+        self.relevance_filter = relevance_filter
+        self.raw_tables = raw_tables
+        self._views = {}
+        self._analyzers = {}
+
+    def view(self, audience_level: str = 'executive', content_length: str = 'medium') -> List[Dict]:
+        """Sections filtered for an audience and length"""
+        key = (audience_level, content_length)
+        if key not in self._views:
+            self._views[key] = self.relevance_filter.select(self.sections, audience_level, content_length)
+        return self._views[key]
+
+    def analyzer(self, audience_level: str = 'executive', content_length: str = 'medium') -> 'DataAnalyzer':
+        """Numerical analysis of a view"""
+        from modules.data_analyzer import DataAnalyzer
+
+        key = (audience_level, content_length)
+        if key not in self._analyzers:
+            analyzer = DataAnalyzer()
+            view = self.view(audience_level, content_length)
+            analyzer.extract_and_analyze(view)
+
+            # Tables of the sections in this view; those ahead of any section text belong to every view
+            shown = {section['title'] for section in view}
+            known = {section['title'] for section in self.sections}
+            analyzer.tables = [table for table in self.tables
+                               if table['section'] in shown or table['section'] not in known]
+            if Config.TABLE_CHARTS:
+                analyzer.chart_tables()
+            self._analyzers[key] = analyzer
+        return self._analyzers[key]
+
+    @cached_property
+    def tables(self) -> List[Dict]:
+        """Extracted tables as DataFrames with per-column statistics"""
+        if not self.raw_tables:
+            return []
+
+        from modules.data_analyzer import DataAnalyzer
+
+        return [DataAnalyzer.build_table(table['title'], table['rows'], page=table['page'],
+                                         section=table['section'])
+                for table in self.raw_tables]
+
+    @cached_property
+    def stats(self) -> Dict:
+        """Size statistics of the raw extraction"""
+        buffer = self.sections.buffer
+        return {
+            'sections': len(self.sections),
+            'lines': self.sections.line_count,
+            'words': len(buffer.split()),
+            'characters': len(buffer) - self.sections.line_count  # Less the line separators
+        }
+
 
 class DocumentParser:
-    def __init__(self, filepath: str):
+    # Extension -> (extractor method, backend module imported on first use)
+    EXTRACTORS = {
+        ".pdf": ("_extract_pdf", "pdfplumber"),
+        ".docx": ("_extract_docx", None),
+        ".txt": ("_extract_txt", None)
+    }
+
+    def __init__(self, filepath: str, parallel_pdf: Optional[bool] = None,
+                 relevance_filter: Optional[RelevanceFilter] = None,
+                 extract_tables: Optional[bool] = None):
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Input file not found: {filepath}")
         self.filepath = filepath
+        self.parallel_pdf = Config.PDF_PARALLEL if parallel_pdf is None else parallel_pdf
+        self.relevance_filter = relevance_filter or get_relevance_filter()
+        # Tables only feed the analytics slides
+        if extract_tables is None:
+            extract_tables = Config.EXTRACT_TABLES and Config.ENABLE_ANALYTICS
+        self.extract_tables = extract_tables
+        self.raw_tables = []  # {'title', 'rows', 'page', 'section'} collected during extraction
+        self._section = None  # Title of the section being built, for the tables found in it
+        self._parsed = None
+
+    def parse(self) -> ParsedDocument:
+        """Extract the document once and return the memoized result"""
+        if self._parsed is not None:
+            return self._parsed
 
-    def extract_content(self, audience_level='executive', content_length='medium') -> List[Dict]:
         ext = os.path.splitext(self.filepath)[-1].lower()
 
         try:
-            if ext == ".pdf":
-                content = self._extract_pdf()
-            elif ext == ".docx":
-                content = self._extract_docx()
-            elif ext == ".txt":
-                content = self._extract_txt()
-            else:
+            if ext not in self.EXTRACTORS:
                 raise ValueError(f"Unsupported file format: {ext}")
 
-            return self._filter_content(content, audience_level, content_length)
+            method, backend = self.EXTRACTORS[ext]
+            if backend:
+                self._load_backend(backend)
+            content = getattr(self, method)()
 
         except Exception as e:
             raise Exception(f"Error processing {self.filepath}: {str(e)}")
 
-    def _filter_content(self, content: List[Dict], audience_level: str, content_length: str) -> List[Dict]:
-        # Implement your filtering logic based on audience and length
-        filtered_content = content.copy()
+        self._parsed = ParsedDocument(content, self.relevance_filter, self.raw_tables)
+        return self._parsed
 
-        # Example filtering for different audiences
-        if audience_level == 'executive':
-            filtered_content = [section for section in content
-                             if any(kw in section['title'].lower()
-                             for kw in ['summary', 'key', 'result', 'conclusion'])]
+    def extract_content(self, audience_level='executive', content_length='medium') -> List[Dict]:
+        return self.parse().view(audience_level, content_length)
 
-        # Adjust content length
-        if content_length == 'short':
-            filtered_content = filtered_content[:5]
-        elif content_length == 'medium':
-            filtered_content = filtered_content[:10]
+    @staticmethod
+    def _load_backend(module_name: str):
+        """Import a format backend, with a clear error if it is not installed"""
+        try:
+            return importlib.import_module(module_name)
+        except ImportError as e:
+            raise ImportError(f"The '{module_name}' package is required for this format: {str(e)}")
 
-        return filtered_content
+    def _filter_content(self, content: List[Dict], audience_level: str, content_length: str) -> List[Dict]:
+        """Keep the most relevant sections for the audience, within the length budget"""
+        return self.relevance_filter.select(content, audience_level, content_length)
 
     def analyze_numerical_content(self, content=None):
         """Analyze document content for numerical data"""
         if content is None:
-            content = self.extract_content()
+            return self.parse().analyzer()
+
+        from modules.data_analyzer import DataAnalyzer
 
         analyzer = DataAnalyzer()
         analyzer.extract_and_analyze(content)  # Note the corrected method name
         return analyzer
 
-
-
-    def _extract_pdf(self) -> List[Dict]:
-        text = ""
+    def _extract_pdf(self) -> Document:
         try:
-            with pdfplumber.open(self.filepath) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or "" + "\n"
-            return self._structure_content(text)
+            return self._structure_lines(self._iter_pdf_lines())
         except Exception as e:
             raise Exception(f"PDF extraction failed: {str(e)}")
 
-    def _extract_docx(self) -> List[Dict]:
+    def _iter_pdf_lines(self) -> Iterator[str]:
+        """Yield the lines of every page in document order"""
+        for page_text in self._iter_pdf_pages():
+            yield from page_text.split("\n")
+
+    def _iter_pdf_pages(self) -> Iterator[str]:
+        """
+        Yield page text one page at a time, in parallel for large documents.
+
+        Tables found by pdfplumber's table finder are collected into
+        raw_tables in the same pass, while each page's layout is loaded.
+        """
+        pdfplumber = self._load_backend("pdfplumber")
+        with pdfplumber.open(self.filepath) as pdf:
+            page_count = len(pdf.pages)
+            if not (self.parallel_pdf and page_count >= Config.PDF_PARALLEL_MIN_PAGES):
+                for number, page in enumerate(pdf.pages, 1):
+                    text = page.extract_text() or ""
+                    if self.extract_tables:
+                        for rows in page.extract_tables():
+                            self._add_raw_table(rows, page=number)
+                    page.close()  # Drop cached layout objects as we go
+                    yield text
+                return
+
+        yield from self._iter_pdf_pages_parallel(page_count)
+
+    def _iter_pdf_pages_parallel(self, page_count: int) -> Iterator[str]:
+        """Split the page range across a process pool, keeping page order"""
+        chunk = Config.PDF_PAGES_PER_TASK
+        ranges = [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+
+        with ProcessPoolExecutor(max_workers=Config.PDF_WORKERS) as executor:
+            results = executor.map(
+                _extract_pdf_page_range,
+                [self.filepath] * len(ranges),
+                [start for start, _ in ranges],
+                [stop for _, stop in ranges],
+                [self.extract_tables] * len(ranges)
+            )
+            for (start, _), pages in zip(ranges, results):
+                for number, (text, tables) in enumerate(pages, start + 1):
+                    for rows in tables:
+                        self._add_raw_table(rows, page=number)
+                    yield text
+
+    def _add_raw_table(self, rows: List[List[Optional[str]]], page: Optional[int] = None) -> bool:
+        """
+        Keep a table with at least a header, one row and two columns; cells are cleaned up.
+
+        Returns whether it was kept. Extraction runs interleaved with
+        _structure_lines(), so the section being built is the table's.
+        """
+        rows = [[" ".join((cell or "").split()) for cell in row] for row in rows]
+        rows = [row for row in rows if any(row)]
+        if len(rows) < 2 or max(len(row) for row in rows) < 2:
+            return False
+        number = len(self.raw_tables) + 1
+        title = f"Table {number} (page {page})" if page else f"Table {number}"
+        self.raw_tables.append({'title': title, 'rows': rows, 'page': page, 'section': self._section})
+        return True
+
+    def _extract_docx(self) -> Document:
         try:
-            doc = docx.Document(self.filepath)
-            content = []
-            for para in doc.paragraphs:
-                if para.style.name.startswith("Heading"):
-                    content.append("# " + para.text)  # Mark headings
-                else:
-                    content.append(para.text)
-            return self._structure_content("\n".join(content))
+            return self._structure_lines(self._iter_docx_lines())
         except Exception as e:
             raise Exception(f"DOCX extraction failed: {str(e)}")
 
-    def _extract_txt(self) -> List[Dict]:
+    def _iter_docx_lines(self) -> Iterator[str]:
+        """
+        Stream lines out of word/document.xml without building the document tree.
+
+        Like python-docx's Document.paragraphs and .tables, only paragraphs
+        and tables directly in the body count; content controls (e.g. a table
+        of contents) and text boxes are skipped. Headings are marked with
+        '# '. Tables go to raw_tables; when table extraction is off (or a
+        table is too small to keep) each row becomes one line instead.
+        Body-level elements are dropped as soon as they are handled so memory
+        stays flat regardless of document size.
+        """
+        with zipfile.ZipFile(self.filepath) as package:
+            heading_styles = _docx_heading_styles(package)
+            with package.open("word/document.xml") as xml:
+                body = None
+                depth = 0
+
+                for event, elem in ET.iterparse(xml, events=("start", "end")):
+                    if event == "start":
+                        depth += 1
+                        if elem.tag == W_BODY:
+                            body = elem
+                        continue
+
+                    # document > body > block: handle and release each block once it is complete
+                    depth -= 1
+                    if depth != 2 or body is None:
+                        continue
+
+                    if elem.tag == W_TBL:
+                        cells = _docx_table_cells(elem)
+                        if not (self.extract_tables and self._add_raw_table(cells)):
+                            yield from (" | ".join(row) for row in cells if any(row))
+                    elif elem.tag == W_P:
+                        style = elem.find(f"{W_NS}pPr/{W_STYLE}")
+                        text = _docx_text(elem)
+                        if style is not None and style.get(W_VAL) in heading_styles:
+                            yield "# " + text.replace("\n", " ")
+                        else:
+                            yield from text.split("\n")
+                    body.remove(elem)
+
+    def _extract_txt(self) -> Document:
         try:
-            with open(self.filepath, "r", encoding="utf-8") as file:
-                return self._structure_content(file.read())
+            return self._structure_lines(self._iter_txt_lines())
         except Exception as e:
             raise Exception(f"TXT extraction failed: {str(e)}")
 
+    def _iter_txt_lines(self) -> Iterator[str]:
+        return chain.from_iterable(_iter_text_chunks(self.filepath))
+
     def extract_numerical_content(self):
         """Extract content with focus on numerical data sections"""
-        structured = self.extract_content()
-        analyzer = DataAnalyzer()
-        analyzer.extract_numerical_data(structured)
-        return analyzer
+        return self.parse().analyzer()
 
-    def _structure_content(self, text: str) -> List[Dict]:
-        sections = text.split("\n")
-        structured_data = []
-        current_section = {"title": "Introduction", "content": []}
+    def _structure_content(self, text: str) -> Document:
+        return self._structure_lines(text.split("\n"))
 
-        for line in sections:
+    def _structure_lines(self, lines: Iterable[str]) -> Document:
+        """Build sections incrementally from a stream of lines"""
+        builder = DocumentBuilder()
+        builder.add_section("Introduction", keep_empty=False)
+        self._section = "Introduction"
+
+        for line in lines:
             line = line.strip()
             if not line:
                 continue
 
             if line.startswith("# "):
-                if current_section["content"] or current_section["title"] != "Introduction":
-                    structured_data.append(current_section)
-                current_section = {"title": line[2:].strip(), "content": []}
+                title = line[2:].strip()
+                builder.add_section(title, keep_empty=title != "Introduction")
+                self._section = title
             else:
-                if line:  # Only add non-empty lines
-                    current_section["content"].append(line)
-
-        if current_section["content"] or current_section["title"] != "Introduction":
-            structured_data.append(current_section)
+                builder.add_line(line)
 
-        return structured_data
\ No newline at end of file
+        return builder.build()
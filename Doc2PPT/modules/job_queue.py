@@ -0,0 +1,391 @@
+# modules/job_queue.py - Local conversion job queue
+import asyncio
+import atexit
+import math
+import multiprocessing
+import multiprocessing.util  # Registers its exit handler (joining worker processes) before ours
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached its maximum depth"""
+
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until a slot is likely to free up
+
+
+def _worker_loop(target: Callable, initializer: Optional[Callable], conn):
+    """
+    Worker process: run the jobs sent over conn one at a time until told to stop.
+
+    Sibling workers inherit copies of this pipe, so its end never reads EOF;
+    a None job stops the worker, and it also exits once the queue's process
+    is gone (it is re-parented).
+    """
+    parent = os.getppid()
+    if initializer:
+        try:
+            initializer()
+        except Exception:
+            pass  # Warm-up only; a job that needs what failed reports the error itself
+
+    while True:
+        while not conn.poll(1.0):
+            if os.getppid() != parent:
+                return
+        kwargs = conn.recv()
+        if kwargs is None:
+            return
+        try:
+            result = target(**kwargs)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        conn.send(result)
+
+
+class _Worker:
+    """A long-lived worker process and the pipe its jobs and results travel over"""
+
+    def __init__(self, context, target: Callable, initializer: Optional[Callable]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(target, initializer, child_conn))
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def send(self, kwargs: Dict):
+        self.jobs += 1
+        self.conn.send(kwargs)
+
+    def receive(self) -> Dict:
+        """The job's result, or a failure naming the exit code if the process died first"""
+        try:
+            return self.conn.recv()
+        except EOFError:
+            self.process.join(5)
+            return {"success": False,
+                    "error": f"Worker process exited unexpectedly (exit code {self.process.exitcode})"}
+
+    def stop(self, terminate: bool = False):
+        """Let the worker exit after its current job, or kill it right away"""
+        if terminate:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass  # Already gone
+        self.conn.close()
+
+
+class JobTable:
+    """Job records and their bounded history, shared by the job queues"""
+
+    def __init__(self, max_history: int = 1000):
+        self.max_history = max_history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job's state, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _create(self, meta: Dict, job_id: Optional[str] = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "meta": meta
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim_history()
+        return job_id
+
+    def _finish(self, job_id: str, result: Dict):
+        """Record the result a worker process sent back"""
+        if result.get("success"):
+            self._update(job_id, status="completed", finished_at=time.time(), result=result)
+        else:
+            self._update(job_id, status="failed", finished_at=time.time(),
+                         result=result, error=result.get("error"))
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _trim_history(self):
+        """Drop the oldest finished jobs once the history limit is exceeded"""
+        if len(self._jobs) <= self.max_history:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_history:
+                break
+            if self._jobs[job_id]["status"] not in ("queued", "running"):
+                del self._jobs[job_id]
+
+
+class JobQueue(JobTable):
+    """
+    In-process job queue backed by a pool of worker processes.
+
+    Jobs wait in a bounded queue until one of the dispatcher threads picks
+    them up. Each dispatcher hands its jobs to its own long-lived worker
+    process, warmed up once by initializer, so imports and caches carry over
+    from job to job. A worker that exceeds the per-job timeout is terminated
+    without affecting other jobs; it is replaced, as is one that dies or has
+    run max_jobs_per_worker jobs.
+    """
+
+    def __init__(self, target: Callable, workers: int = 2, max_depth: int = 50,
+                 job_timeout: float = 300, max_history: int = 1000,
+                 on_finish: Optional[Callable[[Dict], None]] = None,
+                 initializer: Optional[Callable] = None, max_jobs_per_worker: Optional[int] = None):
+        super().__init__(max_history)
+        self.target = target
+        self.on_finish = on_finish
+        self.job_timeout = job_timeout
+        self.initializer = initializer
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._pending = queue.Queue(maxsize=max_depth)
+        self._context = multiprocessing.get_context()
+        self._workers = set()
+        atexit.register(self.shutdown)
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._dispatch, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+
+    def submit(self, **kwargs) -> str:
+        """
+        Queue a job and return its id.
+
+        Besides the target's arguments, kwargs may carry meta (kept with the
+        job record), job_id (to choose the id) and timeout (overriding
+        job_timeout for this job).
+        """
+        job_id = self._create(kwargs.pop("meta", {}), kwargs.pop("job_id", None))
+        timeout = kwargs.pop("timeout", None) or self.job_timeout
+
+        try:
+            self._pending.put_nowait((job_id, kwargs, timeout))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise QueueFullError("Job queue is full, try again later")
+
+        return job_id
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to be picked up"""
+        return self._pending.qsize()
+
+    def shutdown(self):
+        """Stop the worker processes once their current jobs are done"""
+        with self._lock:
+            workers, self._workers = self._workers, set()
+        for worker in workers:
+            worker.stop()
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.target, self.initializer)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _retire_worker(self, worker: _Worker, terminate: bool = False):
+        with self._lock:
+            self._workers.discard(worker)
+        worker.stop(terminate)
+        worker.process.join()
+
+    def _dispatch(self):
+        """Worker loop: take jobs off the queue and run them one at a time on this thread's process"""
+        worker = self._start_worker()
+        while True:
+            job_id, kwargs, timeout = self._pending.get()
+            try:
+                if worker is None:
+                    worker = self._start_worker()
+                self._update(job_id, status="running", started_at=time.time())
+                if not self._execute(worker, job_id, kwargs, timeout):
+                    worker = None
+                elif self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+                    self._retire_worker(worker)
+                    worker = None
+                if self.on_finish:
+                    self.on_finish(self.status(job_id))
+            except Exception:
+                pass  # A failing callback must not kill the worker thread
+            finally:
+                self._pending.task_done()
+
+    def _execute(self, worker: _Worker, job_id: str, kwargs: Dict, timeout: float) -> bool:
+        """Run a single job on a worker, enforcing the timeout; return whether the worker is still usable"""
+        try:
+            worker.send(kwargs)
+
+            if not worker.conn.poll(timeout):
+                self._retire_worker(worker, terminate=True)
+                self._update(job_id, status="timeout", finished_at=time.time(),
+                             error=f"Job exceeded timeout of {timeout}s")
+                return False
+
+            result = worker.receive()
+            self._finish(job_id, result)
+            if worker.process.is_alive():
+                return True
+            self._retire_worker(worker)
+            return False
+
+        except Exception as e:
+            self._retire_worker(worker, terminate=True)
+            self._update(job_id, status="failed", finished_at=time.time(), error=str(e) or type(e).__name__)
+            return False
+
+
+
+class AsyncJobQueue(JobTable):
+    """
+    asyncio counterpart of JobQueue for the ASGI server.
+
+    At most `workers` jobs run at once, each on a long-lived worker process
+    (as in JobQueue) that the event loop watches without blocking a thread;
+    up to `max_depth` more wait for a slot. Beyond that submit() sheds the job with QueueFullError
+    carrying a Retry-After estimate from recent job durations, so load is
+    rejected up front instead of piling up.
+    """
+
+    def __init__(self, target: Callable, workers: int = 2, max_depth: int = 8,
+                 job_timeout: float = 300, max_history: int = 1000,
+                 on_finish: Optional[Callable[[Dict], None]] = None,
+                 default_retry_after: int = 5,
+                 initializer: Optional[Callable] = None, max_jobs_per_worker: Optional[int] = None):
+        super().__init__(max_history)
+        self.target = target
+        self.workers = workers
+        self.initializer = initializer
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_depth = max_depth
+        self.job_timeout = job_timeout
+        self.on_finish = on_finish
+        self.default_retry_after = default_retry_after
+        self._slots = asyncio.Semaphore(workers)
+        self._active = 0  # Queued plus running
+        self._running = 0
+        self._tasks = set()
+        self._durations = deque(maxlen=20)
+        self._context = multiprocessing.get_context()
+        self._idle = []  # Started workers without a job
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    def start(self):
+        """Start the worker processes ahead of the first job (e.g. at server startup)"""
+        while len(self._idle) + self._running < self.workers:
+            self._idle.append(_Worker(self._context, self.target, self.initializer))
+
+    def shutdown(self):
+        """Stop the idle worker processes; busy ones are stopped when their job ends"""
+        workers, self._idle = self._idle, []
+        self._closed = True
+        for worker in workers:
+            worker.stop()
+
+    def submit(self, **kwargs) -> str:
+        """Queue a job on the running event loop and return its id; kwargs as for JobQueue.submit()"""
+        if self._active >= self.workers + self.max_depth:
+            raise QueueFullError("Conversion capacity is saturated, try again later",
+                                 retry_after=self.retry_after())
+
+        job_id = self._create(kwargs.pop("meta", {}), kwargs.pop("job_id", None))
+        timeout = kwargs.pop("timeout", None) or self.job_timeout
+        self._active += 1
+        task = asyncio.get_running_loop().create_task(self._run(job_id, kwargs, timeout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker slot"""
+        return self._active - self._running
+
+    def retry_after(self) -> int:
+        """Seconds until a worker slot is likely to free up"""
+        if not self._durations:
+            return self.default_retry_after
+        average = sum(self._durations) / len(self._durations)
+        rounds = (self.depth + self.workers) / self.workers
+        return max(1, min(math.ceil(average * rounds), math.ceil(self.job_timeout)))
+
+    async def _run(self, job_id: str, kwargs: Dict, timeout: float):
+        try:
+            async with self._slots:
+                self._running += 1
+                started = time.time()
+                self._update(job_id, status="running", started_at=started)
+                worker = self._idle.pop() if self._idle else _Worker(self._context, self.target, self.initializer)
+                try:
+                    reusable = await self._execute(worker, job_id, kwargs, timeout)
+                finally:
+                    self._running -= 1
+                    self._durations.append(time.time() - started)
+                if reusable and not self._closed and not (
+                        self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker):
+                    self._idle.append(worker)
+                else:
+                    await self._retire_worker(worker, terminate=not reusable)
+            if self.on_finish:
+                self.on_finish(self.status(job_id))
+        except Exception:
+            pass  # A failing callback must not surface as an unhandled task error
+        finally:
+            self._active -= 1
+
+    async def _retire_worker(self, worker: _Worker, terminate: bool = False):
+        worker.stop(terminate)
+        await asyncio.get_running_loop().run_in_executor(None, worker.process.join)
+
+    async def _execute(self, worker: _Worker, job_id: str, kwargs: Dict, timeout: float) -> bool:
+        """Run a single job on a worker, enforcing the timeout; return whether the worker is still usable"""
+        loop = asyncio.get_running_loop()
+        try:
+            worker.send(kwargs)
+
+            # The result (or EOF if the worker dies) makes the pipe readable
+            readable = loop.create_future()
+            loop.add_reader(worker.conn.fileno(), lambda: readable.done() or readable.set_result(None))
+            try:
+                await asyncio.wait_for(readable, timeout)
+            except asyncio.TimeoutError:
+                self._update(job_id, status="timeout", finished_at=time.time(),
+                             error=f"Job exceeded timeout of {timeout}s")
+                return False  # Terminated by the caller
+            finally:
+                loop.remove_reader(worker.conn.fileno())
+
+            result = await loop.run_in_executor(None, worker.receive)
+            self._finish(job_id, result)
+            return worker.process.is_alive()
+
+        except Exception as e:
+            self._update(job_id, status="failed", finished_at=time.time(), error=str(e) or type(e).__name__)
+            return False
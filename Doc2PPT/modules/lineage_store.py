@@ -0,0 +1,121 @@
+# modules/lineage_store.py - Previous decks of a document lineage, for slide reuse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Optional, Tuple
+
+from pptx import Presentation
+
+from modules.conversion_cache import link_or_copy
+
+# Bump when slide generation changes so decks built by older code are not reused
+LINEAGE_FORMAT_VERSION = 1
+
+
+def section_hash(section: Dict, max_bullets: int) -> str:
+    """Content hash of a parsed section, as it affects the slides built from it"""
+    digest = hashlib.sha256()
+    digest.update(f"{LINEAGE_FORMAT_VERSION}\0{max_bullets}\0{section['title']}".encode("utf-8"))
+    for line in section["content"]:
+        digest.update(b"\0")
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LineageStore:
+    """
+    Keeps the latest deck of each lineage (revisions of the same document)
+    together with a manifest of which slides each section produced.
+
+    The manifest is only used when it was built with the same options key,
+    so reuse never mixes decks generated from different templates or options.
+    As in ConversionCache, the manifest mtime is the LRU timestamp: the least
+    recently used lineages are dropped once the store grows past its size or
+    entry limits.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 200 * 1024 * 1024, max_entries: int = 500):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+
+    def load(self, lineage: str, options_key: str) -> Optional[Tuple[Presentation, Dict]]:
+        """Return the previous deck and its manifest, or None if nothing reusable exists"""
+        directory = self._directory(lineage)
+        manifest_path = os.path.join(directory, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+            if manifest.get("options_key") != options_key:
+                return None
+            presentation = Presentation(os.path.join(directory, manifest["deck"]))
+            os.utime(manifest_path)  # Mark as most recently used
+            return presentation, manifest
+        except Exception:
+            return None  # A damaged entry just means a full rebuild
+
+    def save(self, lineage: str, pptx_path: str, options_key: str, sections: list):
+        """
+        Record a freshly generated deck as the latest revision of its lineage.
+
+        Each revision's deck gets its own file and the manifest naming it is
+        swapped in atomically, so a manifest always matches its deck even
+        when revisions are saved concurrently.
+        """
+        directory = self._directory(lineage)
+        os.makedirs(directory, exist_ok=True)
+        deck = f"deck-{uuid.uuid4().hex}.pptx"
+        link_or_copy(pptx_path, os.path.join(directory, deck))
+
+        manifest_path = os.path.join(directory, "manifest.json")
+        tmp_path = f"{manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"options_key": options_key, "deck": deck, "sections": sections}, file)
+        os.replace(tmp_path, manifest_path)
+
+        # Drop decks of older revisions
+        for name in os.listdir(directory):
+            if name.startswith("deck-") and name != deck:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+        self._evict(keep=directory)
+
+    def _entries(self):
+        """List lineages as (last used, size, directory) tuples"""
+        entries = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                try:
+                    used = os.stat(os.path.join(entry.path, "manifest.json")).st_mtime
+                    size = sum(os.stat(os.path.join(entry.path, name)).st_size for name in os.listdir(entry.path))
+                except OSError:
+                    continue  # Being written or removed by another process
+                entries.append((used, size, entry.path))
+        return entries
+
+    def _evict(self, keep: str):
+        """Remove least recently used lineages, never keep, until the store is within bounds"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        entries = sorted(entry for entry in entries if entry[2] != keep)
+
+        while entries and (total > self.max_bytes or count > self.max_entries):
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            count -= 1
+
+    def _directory(self, lineage: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(lineage.encode("utf-8")).hexdigest())
@@ -0,0 +1,144 @@
+# modules/media_store.py - Deduplicated image embedding and package writing
+import hashlib
+import io
+import zipfile
+import zlib
+from typing import Optional
+
+from pptx.util import Emu
+from config import Config
+
+try:
+    # Internals of python-pptx 1.0 (see _PackageWriter); other versions save with its defaults
+    from pptx.opc.serialized import PackageWriter
+except ImportError:
+    PackageWriter = None
+
+# Media members are usually compressed by their format already; deflating them again costs
+# time and saves nothing, so they are stored when a fast trial on a sample confirms it
+MEDIA_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'tif', 'tiff', 'mp4', 'm4a', 'mp3', 'wav'}
+STORE_SAMPLE = 64 * 1024
+STORE_MIN_SAVING = 0.1
+
+
+class MediaStore:
+    """
+    Image parts of one presentation, deduplicated by content hash.
+
+    Each distinct image (and displayed size) is downscaled and recompressed
+    once; later slides showing the same bytes reuse the prepared image, which
+    python-pptx then relates to the image part already in the package.
+    """
+
+    def __init__(self, presentation, max_dpi: Optional[int] = None, recompress: bool = False,
+                 png_colors: int = 256, jpeg_quality: int = 85):
+        self.presentation = presentation
+        self.max_dpi = max_dpi
+        self.recompress = recompress
+        self.png_colors = png_colors
+        self.jpeg_quality = jpeg_quality
+        self._blobs = {}
+        self.stats = {'images': 0, 'unique': 0, 'source_bytes': 0, 'stored_bytes': 0}
+
+    @classmethod
+    def from_config(cls, presentation) -> "MediaStore":
+        return cls(presentation, max_dpi=Config.MEDIA_MAX_DPI, recompress=Config.MEDIA_RECOMPRESS,
+                   png_colors=Config.MEDIA_PNG_COLORS, jpeg_quality=Config.MEDIA_JPEG_QUALITY)
+
+    def add_picture(self, slide, image: bytes, left, top, width=None, height=None):
+        """Add a picture showing image bytes to a slide, like slide.shapes.add_picture()"""
+        key = (hashlib.sha256(image).digest(), width, height)
+        blob = self._blobs.get(key)
+        if blob is None:
+            blob = self._blobs[key] = self._prepare(image, width, height)
+            self.stats['unique'] += 1
+            self.stats['source_bytes'] += len(image)
+            self.stats['stored_bytes'] += len(blob)
+        self.stats['images'] += 1
+        return slide.shapes.add_picture(io.BytesIO(blob), left, top, width, height)
+
+    def _prepare(self, image: bytes, width, height) -> bytes:
+        """
+        Downscale to max_dpi at the displayed size and re-encode.
+
+        PNGs are quantized to a png_colors palette (charts rarely use more;
+        alpha is kept) and JPEGs re-encoded at jpeg_quality. The original is
+        kept whenever the result is not smaller.
+        """
+        if not self.max_dpi and not self.recompress:
+            return image
+
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image)) as img:
+            fmt = img.format
+            if fmt not in ('PNG', 'JPEG'):
+                return image
+
+            if self.max_dpi and (width or height):
+                # The unspecified dimension follows the aspect ratio, as in add_picture()
+                scale = min(Emu(box).inches * self.max_dpi / pixels
+                            for box, pixels in ((width, img.width), (height, img.height)) if box)
+                if scale < 1:
+                    img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                                     Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            if fmt == 'JPEG':
+                img.save(buffer, 'JPEG', quality=self.jpeg_quality, optimize=self.recompress)
+            else:
+                if self.recompress and self.png_colors and img.mode != 'P':
+                    img = img.convert('RGBA').quantize(self.png_colors, method=Image.Quantize.FASTOCTREE)
+                img.save(buffer, 'PNG', optimize=self.recompress)
+
+        blob = buffer.getvalue()
+        return blob if len(blob) < len(image) else image
+
+
+class _ZipWriter:
+    """Package member writer with a chosen deflate level; incompressible media is stored"""
+
+    def __init__(self, pkg_file, compress_level: Optional[int]):
+        self._zipf = zipfile.ZipFile(pkg_file, 'w', compression=zipfile.ZIP_DEFLATED,
+                                     compresslevel=compress_level, strict_timestamps=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._zipf.close()
+
+    def write(self, pack_uri, blob: bytes):
+        if pack_uri.ext.lower() in MEDIA_EXTENSIONS and _incompressible(blob):
+            self._zipf.writestr(pack_uri.membername, blob, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zipf.writestr(pack_uri.membername, blob)
+
+
+def _incompressible(blob: bytes) -> bool:
+    sample = blob[:STORE_SAMPLE]
+    return len(zlib.compress(sample, 1)) > len(sample) * (1 - STORE_MIN_SAVING)
+
+
+class _PackageWriter(PackageWriter or object):
+    """python-pptx's PackageWriter with _ZipWriter as its physical writer (python-pptx 1.0.x)"""
+
+    def __init__(self, pkg_file, pkg_rels, parts, compress_level: Optional[int]):
+        super().__init__(pkg_file, pkg_rels, parts)
+        self._compress_level = compress_level
+
+    def _write(self):
+        with _ZipWriter(self._pkg_file, self._compress_level) as phys_writer:
+            self._write_content_types_stream(phys_writer)
+            self._write_pkg_rels(phys_writer)
+            self._write_parts(phys_writer)
+
+
+def save_presentation(presentation, pkg_file, compress_level: Optional[int] = None):
+    """Write a presentation like presentation.save(), with a zlib level (0-9) for its XML parts"""
+    if compress_level is None or PackageWriter is None:
+        presentation.save(pkg_file)
+        return
+    package = presentation.part.package
+    _PackageWriter(pkg_file, package._rels, tuple(package.iter_parts()), compress_level)._write()
+
@@ -2,22 +2,62 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
-from typing import List, Dict
+from pptx.oxml.text import CT_TextBody
+from pptx.text.text import TextFrame
+from types import SimpleNamespace
+from typing import List, Dict, Optional
+import copy
 import os
+import re
+import time
+import uuid
+from modules.template_cache import get_template_cache
+from modules.lineage_store import section_hash
+from modules.media_store import MediaStore, save_presentation
+from modules.relevance_filter import get_relevance_filter
+from config import Config
+
+# Text python-pptx would not store verbatim in <a:t> (line breaks become
+# <a:br/>, other control characters are escaped); such text takes the
+# regular styling path so the output stays identical
+_NEEDS_ESCAPING = re.compile(r"[\x00-\x08\x0A-\x1F]")
 
 class PPTXGenerator:
-    def __init__(self, output_path: str, template_path: str = None):
+    def __init__(self, output_path: str, template_path: str = None, fast_build: Optional[bool] = None):
         self.output_path = output_path
         self.presentation = self._init_presentation(template_path)
         self._setup_styles()
         self.slide_count = 0
         self.max_slides = 20  # Default maximum slides
+        self.fast_build = Config.FAST_SLIDE_BUILDER if fast_build is None else fast_build
+        self._prototypes = {}
+        self.section_slides = []  # Per section: hash and the slides it produced
+        self.reuse_stats = {'reused': 0, 'rebuilt': 0}
+        self._previous = None
+        self._previous_sections = {}
+        self._merge = None
+        self.media = MediaStore.from_config(self.presentation)  # Shared with DataAnalyzer output
+        self.save_stats = None
+
+    def enable_reuse(self, previous_presentation, manifest: Dict):
+        """
+        Reuse slides of unchanged sections from an earlier deck of the same lineage.
+
+        manifest['sections'] lists the section_slides recorded when that deck
+        was generated with the same template and options.
+        """
+        self._previous = previous_presentation
+        self._previous_sections = {
+            entry['hash']: entry for entry in manifest.get('sections', []) if entry.get('complete')
+        }
 
     def generate_presentation(self, content: List[Dict],
                            include_summary: bool = True,
                            include_appendix: bool = False,
                            audience_level: str = 'executive',
-                           presentation_length: str = 'medium'):
+                           presentation_length: str = 'medium',
+                           save: bool = True,
+                           filter_content: bool = True):
         """
         Generate presentation with content and customization options
 
@@ -27,6 +67,10 @@ class PPTXGenerator:
             include_appendix: Whether to include appendix
             audience_level: 'executive', 'management', or 'technical'
             presentation_length: 'short', 'medium', or 'long'
+            save: Whether to write the file now; pass False when more slides
+                  will be added and call save() once at the end
+            filter_content: Whether to filter content by audience; pass False
+                  when it is already a view from ParsedDocument.view()
         """
         try:
             # Set slide limits based on length preference
@@ -40,32 +84,127 @@ class PPTXGenerator:
                 self._add_summary_slide(content)
 
             # Add content slides filtered by audience level
-            filtered_content = self._filter_by_audience(content, audience_level)
+            filtered_content = self._filter_by_audience(content, audience_level) if filter_content else content
             for section in filtered_content:
                 if self.slide_count >= self.max_slides:
                     break
                 self._add_section(section)
 
-            # Add appendix if requested
-            if include_appendix and self.slide_count < self.max_slides:
-                self._add_appendix_slide()
-
-            # Add closing slide
-            if self.slide_count < self.max_slides:
-                self._add_closing_slide()
+            self._finish_slides(include_appendix)
 
             # Save the final presentation
-            self.presentation.save(self.output_path)
+            if save:
+                self.save()
             return True
 
         except Exception as e:
             raise Exception(f"Failed to generate presentation: {str(e)}")
 
+    def begin_merge(self, presentation_length: str = 'medium',
+                    include_summary: bool = True, include_appendix: bool = False):
+        """
+        Start a deck merged from several documents, added with add_document().
+
+        The slide limit is shared by all documents; slides for the appendix
+        and closing are reserved up front so the documents cannot use them.
+        """
+        try:
+            self._set_slide_limits(presentation_length)
+            self._add_title_slide("Document Conversion", "Automatically generated presentation")
+            self._merge = {
+                'summary': self._add_summary_slide([]) if include_summary else None,
+                'reserved': 1 + bool(include_appendix),  # Closing (+ appendix)
+                'include_appendix': include_appendix,
+                'document_limit': self.slide_count  # Slide limit of the document being added
+            }
+        except Exception as e:
+            raise Exception(f"Failed to generate presentation: {str(e)}")
+
+    def add_document(self, content: List[Dict], title: str, remaining_documents: int = 1) -> int:
+        """
+        Append one document of a merged deck: a divider slide, then its sections.
+
+        It gets an equal share of the slides still free among the
+        remaining_documents (this one included); slides a shorter document
+        leaves unused go to the ones after it. Returns the slides added.
+        """
+        try:
+            free = self.max_slides - self._merge['reserved'] - self.slide_count
+            budget = free // max(remaining_documents, 1)
+            self._merge['document_limit'] = self.slide_count + max(budget, 0)
+            if budget < 1:
+                return 0
+
+            summary = self._merge['summary']
+            if summary is not None:
+                self._add_styled_paragraph(summary, title, 'content', level=0)
+                for section in content[:2]:
+                    self._add_styled_paragraph(summary, f"- {section['title']}", 'content', level=1)
+
+            # The section builders stop at max_slides; narrow it to this document's share
+            start, limit = self.slide_count, self.max_slides
+            self.max_slides = start + budget
+            try:
+                self._add_title_slide(title, f"{len(content)} sections")
+                for section in content:
+                    if self.slide_count >= self.max_slides:
+                        break
+                    self._add_section(section)
+            finally:
+                self.max_slides = limit
+            return self.slide_count - start
+        except Exception as e:
+            raise Exception(f"Failed to generate presentation: {str(e)}")
+
+    def remaining_slides(self) -> int:
+        """Slides still free under max_slides, or in a merge under the current document's share"""
+        limit = self._merge['document_limit'] if self._merge else self.max_slides
+        return max(limit - self.slide_count, 0)
+
+    def add_analytics(self, analyzer) -> int:
+        """Add a DataAnalyzer's tables and charts in the slides still free; return the slides added"""
+        added = analyzer.add_to_presentation(self.presentation, self.media, max_slides=self.remaining_slides())
+        self.slide_count += added
+        return added
+
+    def finish_merge(self):
+        """Add the appendix and closing slides reserved by begin_merge()"""
+        self._finish_slides(self._merge['include_appendix'])
+
+    def _finish_slides(self, include_appendix: bool):
+        # Add appendix if requested
+        if include_appendix and self.slide_count < self.max_slides:
+            self._add_appendix_slide()
+
+        # Add closing slide
+        if self.slide_count < self.max_slides:
+            self._add_closing_slide()
+
+    def save(self) -> Dict:
+        """Write the presentation to the output path; return the file size and time taken"""
+        start = time.perf_counter()
+        # The output path may be a hard link to a cached or lineage deck; writing a new file
+        # and renaming it over the path leaves those untouched instead of rewriting them
+        tmp_path = f"{self.output_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            save_presentation(self.presentation, tmp_path, Config.PPTX_COMPRESS_LEVEL)
+            os.replace(tmp_path, self.output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.save_stats = {
+            'bytes': os.path.getsize(self.output_path),
+            'seconds': round(time.perf_counter() - start, 4),
+            'media': dict(self.media.stats)
+        }
+        return self.save_stats
+
     def _init_presentation(self, template_path: str = None):
         """Initialize presentation with proper error handling"""
         try:
             if template_path and os.path.exists(template_path):
-                return Presentation(template_path)
+                return get_template_cache().open(template_path)
             return Presentation()
         except Exception as e:
             raise Exception(f"Failed to initialize presentation: {str(e)}")
@@ -109,13 +248,7 @@ class PPTXGenerator:
 
     def _filter_by_audience(self, content: List[Dict], audience_level: str) -> List[Dict]:
         """Filter content based on audience level"""
-        if audience_level == 'executive':
-            return [section for section in content
-                   if any(kw in section['title'].lower()
-                   for kw in ['summary', 'key', 'result', 'conclusion'])]
-        elif audience_level == 'management':
-            return content[:10]  # First 10 sections for management
-        return content  # All content for technical audience
+        return get_relevance_filter().select(content, audience_level)
 
     def _add_title_slide(self, title: str, subtitle: str):
         """Add title slide to presentation"""
@@ -130,7 +263,7 @@ class PPTXGenerator:
         self.slide_count += 1
 
     def _add_summary_slide(self, content: List[Dict]):
-        """Add summary slide with key points"""
+        """Add summary slide with key points; returns its text frame for more points"""
         if self.slide_count >= self.max_slides:
             return
 
@@ -139,40 +272,70 @@ class PPTXGenerator:
         content_ph = self._get_placeholder(slide, 1)
 
         if title:
-            title.text = "Document Summary"
-            self._format_text(title, 'title')
+            self._set_styled_text(title, "Document Summary", 'title')
 
+        tf = None
         if content_ph:
             tf = content_ph.text_frame
             tf.clear()
 
             # Add key points from first few sections
             for section in content[:3]:
-                p = tf.add_paragraph()
-                p.text = section['title']
-                p.level = 0
-                self._format_text(p, 'content')
+                self._add_styled_paragraph(tf, section['title'], 'content', level=0)
 
                 for point in section['content'][:2]:
-                    p = tf.add_paragraph()
-                    p.text = f"- {point}"
-                    p.level = 1
-                    self._format_text(p, 'content')
+                    self._add_styled_paragraph(tf, f"- {point}", 'content', level=1)
 
         self.slide_count += 1
+        return tf
 
     def _add_section(self, section: Dict):
+        """Add a content section, reusing its slides from the previous revision when unchanged"""
+        max_bullets = self.styles.get('content', {}).get('max_bullets', 5)
+        digest = section_hash(section, max_bullets)
+        start = len(self.presentation.slides)
+        start_count = self.slide_count
+
+        # Slides a complete section needs: its title slide plus one per bullet chunk
+        needed = 1 + -(-len(section['content']) // max_bullets)
+        complete = needed == 1 or self.slide_count + needed - 1 < self.max_slides
+
+        previous = self._previous_sections.get(digest)
+        if previous and complete and previous['count'] == needed:
+            for index in range(previous['start'], previous['start'] + needed):
+                self._copy_slide(self._previous.slides[index])
+            self.slide_count += needed
+            self.reuse_stats['reused'] += needed
+        else:
+            self._build_section(section, max_bullets)
+            self.reuse_stats['rebuilt'] += self.slide_count - start_count
+
+        self.section_slides.append({
+            'hash': digest,
+            'start': start,
+            'count': len(self.presentation.slides) - start,
+            'complete': complete
+        })
+
+    def _copy_slide(self, source_slide):
+        """Append a copy of a text-only slide from another deck built on the same template"""
+        slide = self.presentation.slides.add_slide(self.presentation.slide_layouts[1])
+        tree = slide.shapes._spTree
+        for child in list(tree):
+            tree.remove(child)
+        for child in source_slide.shapes._spTree:
+            tree.append(copy.deepcopy(child))
+
+    def _build_section(self, section: Dict, max_bullets: int):
         """Add a content section with title and bullet points"""
         # Section title slide
         title_slide = self.presentation.slides.add_slide(self.presentation.slide_layouts[1])
         title = self._get_placeholder(title_slide, 0)
         if title:
-            title.text = section["title"]
-            self._format_text(title, 'title')
+            self._set_styled_text(title, section["title"], 'title')
         self.slide_count += 1
 
         # Content slides with bullet points
-        max_bullets = self.styles.get('content', {}).get('max_bullets', 5)
         for i in range(0, len(section['content']), max_bullets):
             if self.slide_count >= self.max_slides:
                 return
@@ -189,17 +352,13 @@ class PPTXGenerator:
         content = self._get_placeholder(slide, 1)
 
         if title:
-            title.text = section_title
-            self._format_text(title, 'title')
+            self._set_styled_text(title, section_title, 'title')
 
         if content:
             tf = content.text_frame
             tf.clear()
             for bullet in bullets:
-                p = tf.add_paragraph()
-                p.text = bullet
-                p.level = 0
-                self._format_text(p, 'content')
+                self._add_styled_paragraph(tf, bullet, 'content')
 
     def _add_appendix_slide(self):
         """Add appendix slide if requested"""
@@ -208,6 +367,7 @@ class PPTXGenerator:
         if title:
             title.text = "Appendix"
             self._format_text(title, 'title')
+        self.slide_count += 1
 
     def _add_closing_slide(self):
         """Add final closing slide"""
@@ -221,6 +381,7 @@ class PPTXGenerator:
         if content:
             content.text = "This presentation was automatically generated"
             self._format_text(content, 'content')
+        self.slide_count += 1
 
     def _get_placeholder(self, slide, idx: int):
         """Safely get placeholder by index"""
@@ -231,6 +392,62 @@ class PPTXGenerator:
         except Exception:
             return None
 
+    def _set_styled_text(self, shape, text: str, style_type: str):
+        """Replace a shape's text with a single styled paragraph"""
+        if not self._can_clone(text):
+            shape.text = text
+            self._format_text(shape, style_type)
+            return
+
+        txBody = shape.text_frame._txBody
+        for p in txBody.p_lst:
+            txBody.remove(p)
+        txBody.append(self._clone_prototype(text, style_type, whole_frame=True))
+
+    def _add_styled_paragraph(self, text_frame, text: str, style_type: str, level: int = 0):
+        """Append a styled paragraph to a text frame"""
+        if not self._can_clone(text):
+            p = text_frame.add_paragraph()
+            p.text = text
+            p.level = level
+            self._format_text(p, style_type)
+            return
+
+        text_frame._txBody.append(self._clone_prototype(text, style_type, level=level))
+
+    def _can_clone(self, text: str) -> bool:
+        return self.fast_build and bool(text) and not _NEEDS_ESCAPING.search(text)
+
+    def _clone_prototype(self, text: str, style_type: str, level: int = 0, whole_frame: bool = False):
+        """Copy of the prebuilt styled paragraph for a style, filled with text"""
+        key = (style_type, level, whole_frame)
+        if key not in self._prototypes:
+            self._prototypes[key] = self._build_prototype(style_type, level, whole_frame)
+
+        p = copy.deepcopy(self._prototypes[key])
+        p.r_lst[0].t.text = text
+        return p
+
+    def _build_prototype(self, style_type: str, level: int, whole_frame: bool):
+        """
+        Style a throwaway paragraph once through the regular path.
+
+        whole_frame mirrors setting shape.text and formatting the shape
+        (paragraph alignment included); otherwise it mirrors add_paragraph
+        plus formatting the paragraph itself.
+        """
+        text_frame = TextFrame(CT_TextBody.new_p_txBody(), None)
+        if whole_frame:
+            text_frame.text = "x"
+            self._format_text(SimpleNamespace(text_frame=text_frame), style_type)
+            p = text_frame.paragraphs[0]
+        else:
+            p = text_frame.add_paragraph()
+            p.text = "x"
+            p.level = level
+            self._format_text(p, style_type)
+        return p._p
+
     def _format_text(self, element, style_type: str):
         """Apply consistent formatting to text elements"""
         style = self.styles.get(style_type, {})
@@ -0,0 +1,89 @@
+# modules/relevance_filter.py - Audience/length filtering of parsed sections
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional
+
+from config import Config
+from modules.document_model import section_text
+
+
+class RelevanceFilter:
+    """
+    Selects the sections to present for an audience and length in one pass.
+
+    Each audience may have a keyword set, compiled into a single
+    case-insensitive regex union. Sections are scored on keyword hits in
+    the title and body; audiences with keywords only keep sections that
+    score above zero. The highest scoring sections that fit the budget
+    (the smaller of the length and audience budgets) are picked with a
+    heap and returned in document order. Audiences without keywords keep
+    the leading sections in document order.
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, Iterable[str]]] = None,
+                 length_budgets: Optional[Dict[str, Optional[int]]] = None,
+                 audience_budgets: Optional[Dict[str, int]] = None,
+                 title_weight: float = 3.0, body_weight: float = 1.0):
+        keywords = Config.AUDIENCE_KEYWORDS if keywords is None else keywords
+        self.length_budgets = Config.LENGTH_BUDGETS if length_budgets is None else length_budgets
+        self.audience_budgets = Config.AUDIENCE_BUDGETS if audience_budgets is None else audience_budgets
+        self.title_weight = title_weight
+        self.body_weight = body_weight
+
+        # Longest keywords first so overlapping alternatives prefer the longer match
+        self._patterns = {
+            audience: re.compile(
+                "|".join(re.escape(kw) for kw in sorted(set(kws), key=len, reverse=True)),
+                re.IGNORECASE
+            )
+            for audience, kws in keywords.items() if kws
+        }
+
+    def select(self, content: List[Dict], audience_level: str, content_length: Optional[str] = None) -> List[Dict]:
+        """Return the sections for an audience and length, in document order"""
+        budget = self._budget(audience_level, content_length)
+        pattern = self._patterns.get(audience_level)
+
+        if pattern is None:
+            # Nothing dropped: parsed content is read-only, so share it instead of copying
+            return content if budget is None else content[:budget]
+
+        scored = []
+        for index, section in enumerate(content):
+            score = self.score(section, pattern)
+            if score > 0:
+                scored.append((score, -index, section))
+
+        if budget is not None and len(scored) > budget:
+            scored = heapq.nlargest(budget, scored, key=lambda item: (item[0], item[1]))
+            scored.sort(key=lambda item: -item[1])
+
+        return [section for _, _, section in scored]
+
+    def score(self, section: Dict, pattern) -> float:
+        """Weighted keyword hits in a section's title and body"""
+        title_hits = len(pattern.findall(section['title']))
+        body_hits = len(pattern.findall(section_text(section))) if self.body_weight else 0
+        return self.title_weight * title_hits + self.body_weight * body_hits
+
+    def _budget(self, audience_level: str, content_length: Optional[str]) -> Optional[int]:
+        budgets = [
+            self.length_budgets.get(content_length) if content_length else None,
+            self.audience_budgets.get(audience_level)
+        ]
+        budgets = [b for b in budgets if b is not None]
+        return min(budgets) if budgets else None
+
+
+relevance_filter = None
+
+
+def get_relevance_filter() -> RelevanceFilter:
+    """Return the process-wide filter built from Config"""
+    global relevance_filter
+    if relevance_filter is None:
+        relevance_filter = RelevanceFilter(
+            title_weight=Config.RELEVANCE_TITLE_WEIGHT,
+            body_weight=Config.RELEVANCE_BODY_WEIGHT
+        )
+    return relevance_filter
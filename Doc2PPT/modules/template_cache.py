@@ -0,0 +1,78 @@
+# modules/template_cache.py - Process-level cache of PowerPoint templates
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from pptx import Presentation
+from config import Config
+
+
+class TemplateCache:
+    """
+    Keeps template packages in memory so conversions skip re-reading them from disk.
+
+    Entries hold the raw package bytes and are checked against the file's
+    mtime and size on every lookup; a changed file is re-read and re-hashed.
+    The least recently used templates are dropped once the total size
+    exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 100 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, template_path: str):
+        """Return a fresh Presentation built from the cached template bytes"""
+        return Presentation(io.BytesIO(self.load(template_path)["data"]))
+
+    def load(self, template_path: str) -> Dict:
+        """Return the cache entry for a template, reading it if missing or stale"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry["version"] == version:
+                self._entries.move_to_end(path)
+                return entry
+
+        with open(path, "rb") as file:
+            data = file.read()
+        entry = {
+            "version": version,
+            "data": data,
+            "sha256": hashlib.sha256(data).hexdigest()
+        }
+
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            self._evict()
+        return entry
+
+    def digest(self, template_path: str) -> Optional[str]:
+        """SHA-256 of the current template contents"""
+        return self.load(template_path)["sha256"]
+
+    def _evict(self):
+        """Drop least recently used templates until within the memory bound"""
+        total = sum(len(entry["data"]) for entry in self._entries.values())
+        while len(self._entries) > 1 and total > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            total -= len(entry["data"])
+
+
+template_cache = None
+
+
+def get_template_cache() -> TemplateCache:
+    """Return the process-wide template cache"""
+    global template_cache
+    if template_cache is None:
+        template_cache = TemplateCache(Config.TEMPLATE_CACHE_MAX_BYTES)
+    return template_cache
@@ -0,0 +1,124 @@
+# modules/upload_registry.py - Persistent index of uploaded documents
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from modules.conversion_cache import hash_file
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload stream exceeds the size limit"""
+
+
+class UploadWriter:
+    """
+    Writes an upload to disk chunk by chunk, hashing it on the way.
+
+    Fed the file part's chunks as the upload parser decodes them. Raises UploadTooLargeError as soon as more than
+    max_bytes have been written; abort() removes the partial file.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = open(path, "wb")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLargeError(f"File exceeds the {self.max_bytes} byte limit")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> Tuple[int, str]:
+        """Close the file and return the size and SHA-256 of what was written"""
+        self._file.close()
+        return self.size, self._digest.hexdigest()
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UploadRegistry:
+    """
+    SQLite-backed index of uploads keyed on file id.
+
+    Replaces scanning the upload folder on every request with a primary-key
+    lookup, and survives restarts because the index lives on disk next to
+    the uploads.
+    """
+
+    def __init__(self, db_path: str, upload_folder: Optional[str] = None):
+        self.db_path = db_path
+        self._local = threading.local()
+        is_new = not os.path.exists(db_path)
+
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                file_id TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._connection().commit()
+
+        # Index uploads that were saved before the registry existed
+        if is_new and upload_folder:
+            self._backfill(upload_folder)
+
+    def register(self, file_id: str, path: str, filename: str,
+                 size: Optional[int] = None, content_hash: Optional[str] = None) -> Dict:
+        """Record an upload and return its index entry"""
+        record = {
+            "file_id": file_id,
+            "path": path,
+            "filename": filename,
+            "size": os.path.getsize(path) if size is None else size,
+            "content_hash": content_hash or hash_file(path).hexdigest(),
+            "created_at": time.time()
+        }
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO uploads VALUES "
+            "(:file_id, :path, :filename, :size, :content_hash, :created_at)",
+            record
+        )
+        conn.commit()
+        return record
+
+    def get(self, file_id: str) -> Optional[Dict]:
+        """Look up an upload by id, or return None if it is unknown or gone from disk"""
+        row = self._connection().execute(
+            "SELECT * FROM uploads WHERE file_id = ?", (file_id,)
+        ).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        return dict(row)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not shareable"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _backfill(self, upload_folder: str):
+        """Register files named '<file_id>_<filename>' already in the upload folder"""
+        for name in os.listdir(upload_folder):
+            path = os.path.join(upload_folder, name)
+            file_id, sep, filename = name.partition("_")
+            if not sep or not os.path.isfile(path) or os.path.abspath(path) == os.path.abspath(self.db_path):
+                continue
+            self.register(file_id, path, filename)
@@ -0,0 +1,411 @@
+# service.py - Conversion API logic shared by the WSGI (app.py) and ASGI (asgi.py) servers
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+
+from main import get_conversion_cache, cache_options
+from modules.conversion_cache import link_or_copy
+from modules.job_queue import QueueFullError
+from modules.upload_registry import UploadWriter
+from config import Config
+from utils.metrics import metrics
+
+UPLOAD_FOLDER = 'uploads'
+OUTPUT_FOLDER = 'outputs'
+ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+
+
+def allowed_file(filename: str) -> bool:
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def conversion_options(data: Dict) -> Dict:
+    """Customization options from a /api/convert request body"""
+    return {
+        'audience_level': data.get('audience', 'executive'),
+        'presentation_length': data.get('length', 'medium'),
+        'include_summary': data.get('summary', True),
+        'include_appendix': data.get('appendix', False)
+    }
+
+
+def output_filename(file_id: str) -> str:
+    return f"converted_{file_id}.pptx"
+
+
+def serve_cached(upload: Dict, options: Dict, output_path: str) -> bool:
+    """Place a cached deck for an identical document at output_path; return whether it was cached"""
+    cache = get_conversion_cache()
+    if not cache:
+        return False
+
+    cache_key = cache.make_key(upload['path'], None, cache_options(**options),
+                               content_hash=upload['content_hash'])
+    cached_path = cache.get(cache_key)
+    if not cached_path:
+        return False
+
+    link_or_copy(cached_path, output_path)
+    return True
+
+
+def conversion_job(file_id: str, upload: Dict, data: Dict, options: Dict, output_path: str) -> Dict:
+    """Keyword arguments of a queued convert_document job"""
+    return dict(
+        input_file=upload['path'],
+        output_pptx=output_path,
+        # Revisions of the same document share a lineage; only reused when the client names one,
+        # since unrelated uploads often share a filename
+        lineage=data.get('lineage') or None,
+        meta={
+            'fileId': file_id,
+            'filename': os.path.basename(output_path),
+            'format': os.path.splitext(upload['path'])[-1].lower().lstrip('.')
+        },
+        **options
+    )
+
+
+class MultipartUpload:
+    """
+    Incremental multipart/form-data parser for /api/upload that writes the
+    'document' part to disk as its chunks arrive.
+
+    The file is written once, straight from the request body, rather than
+    spooled to a temporary file first (as request.files does) and copied.
+    Servers bound the body size they feed it, which also bounds the
+    decoder's buffering.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.decoder = MultipartDecoder(boundary)
+        self.found = False
+        self.error = None
+        self.filename = None
+        self.file_id = None
+        self.writer = None
+        self._writing = False
+
+    def feed(self, chunk: Optional[bytes]):
+        """Parse a body chunk (None at the end of the body); stops early on a client error"""
+        self.decoder.receive_data(chunk)
+        while self.error is None:
+            try:
+                event = self.decoder.next_event()
+            except ValueError:
+                self.error = "Malformed multipart body"  # e.g. cut off before the closing boundary
+                return
+            if isinstance(event, (NeedData, Epilogue)):
+                return
+            if isinstance(event, File) and event.name == "document" and not self.found:
+                self.found = True
+                self._start(event.filename)
+            elif isinstance(event, (File, Field)):
+                self._writing = False
+            elif isinstance(event, Data) and self._writing:
+                self.writer.write(event.data)
+                self._writing = event.more_data
+
+    def _start(self, filename: str):
+        if filename == "":
+            self.error = "No selected file"
+        elif not allowed_file(filename):
+            self.error = "Invalid file type"
+        else:
+            self.filename = secure_filename(filename)
+            self.file_id = str(uuid.uuid4())
+            path = os.path.join(UPLOAD_FOLDER, f"{self.file_id}_{self.filename}")
+            self.writer = UploadWriter(path, Config.MAX_FILE_SIZE)
+            self._writing = True
+
+
+class RequestError(ValueError):
+    """A merge or batch request names no, too many or unknown uploads"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def merge_uploads(data: Dict, upload_registry) -> List[Dict]:
+    """Uploads named by the fileIds of a /api/convert/merge request body, in order"""
+    file_ids = data.get('fileIds')
+    if not isinstance(file_ids, list) or not file_ids or not all(isinstance(i, str) for i in file_ids):
+        raise RequestError('fileIds must be a non-empty list of file ids')
+    if len(file_ids) > Config.MERGE_MAX_DOCUMENTS:
+        raise RequestError(f'At most {Config.MERGE_MAX_DOCUMENTS} documents can be merged')
+
+    uploads = [upload_registry.get(file_id) for file_id in file_ids]
+    missing = [file_id for file_id, upload in zip(file_ids, uploads) if not upload]
+    if missing:
+        raise RequestError(f"File not found: {', '.join(missing)}", status=404)
+    return uploads
+
+
+def merge_filename(merge_id: str) -> str:
+    return f"merged_{merge_id}.pptx"
+
+
+def merge_job(merge_id: str, uploads: List[Dict], options: Dict, output_path: str) -> Dict:
+    """Keyword arguments of a queued merge_documents job"""
+    return dict(
+        input_files=[upload['path'] for upload in uploads],
+        output_pptx=output_path,
+        titles=[os.path.splitext(upload['filename'])[0] for upload in uploads],
+        meta={
+            'mergeId': merge_id,
+            'filename': os.path.basename(output_path),
+            'format': 'merge'
+        },
+        **options
+    )
+
+
+def batch_items(data: Dict, upload_registry) -> List[Dict]:
+    """
+    Items of a /api/convert/batch request body, each {'fileId', 'upload', 'options'}.
+
+    'files' lists file ids or {'fileId': ..., <options>} objects whose
+    options override the shared ones given at the top level of the body.
+    """
+    files = data.get('files', data.get('fileIds'))
+    if not isinstance(files, list) or not files:
+        raise RequestError('files must be a non-empty list of file ids')
+    if len(files) > Config.BATCH_MAX_FILES:
+        raise RequestError(f'At most {Config.BATCH_MAX_FILES} files can be converted in one batch')
+
+    items, missing = [], []
+    for entry in files:
+        overrides = entry if isinstance(entry, dict) else {'fileId': entry}
+        file_id = overrides.get('fileId')
+        if not isinstance(file_id, str):
+            raise RequestError('Every batch entry needs a fileId')
+        upload = upload_registry.get(file_id)
+        if not upload:
+            missing.append(file_id)
+            continue
+        items.append({'fileId': file_id, 'upload': upload, 'options': conversion_options({**data, **overrides})})
+
+    if missing:
+        raise RequestError(f"File not found: {', '.join(missing)}", status=404)
+    return items
+
+
+def batch_filename(batch_id: str) -> str:
+    return f"batch_{batch_id}.zip"
+
+
+class BatchTracker:
+    """
+    Batch conversions, each file converted by its own job on the shared queue.
+
+    A batch keeps at most in_flight of its items in the queue and submits
+    the next one as an item finishes, so it takes turns with other requests
+    instead of holding a worker for the whole batch, and each item gets the
+    usual per-job timeout. Once every item has finished, one more job zips
+    the decks that were generated. A batch's status is the aggregate of its
+    item jobs.
+    """
+
+    def __init__(self, job_queue, in_flight: int = 2, max_history: int = 1000):
+        self.job_queue = job_queue
+        self.in_flight = in_flight
+        self.max_history = max_history
+        self._batches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, items: List[Dict]) -> str:
+        """Queue a batch of batch_items() and return its id; QueueFullError if no item fits in the queue"""
+        batch_id = str(uuid.uuid4())
+        batch = {'id': batch_id, 'items': [], 'archive': None}
+        for index, item in enumerate(items):
+            output_path = os.path.join(OUTPUT_FOLDER, output_filename(f"{batch_id}-{index}"))
+            job = conversion_job(item['fileId'], item['upload'], {}, item['options'], output_path)
+            job['meta'].update(batchId=batch_id, index=index)
+            batch['items'].append({
+                'fileId': item['fileId'],
+                'filename': item['upload']['filename'],
+                'name': f"{os.path.splitext(item['upload']['filename'])[0]}.pptx",
+                'output_path': output_path,
+                'job': dict(job, job_id=f"{batch_id}-{index}"),
+                'status': 'pending'  # Not in the job queue yet
+            })
+
+        with self._lock:
+            self._batches[batch_id] = batch
+            try:
+                self._advance(batch, required=True)
+            except QueueFullError:
+                del self._batches[batch_id]
+                raise
+            self._trim_history()
+        return batch_id
+
+    def job_finished(self, job: Dict):
+        """Job queue on_finish hook: record a batch job's outcome and queue what can run next"""
+        with self._lock:
+            batch = self._batches.get(job['meta'].get('batchId'))
+            if batch and job['meta'].get('archive'):
+                batch['archive'].update(status=job['status'], error=job['error'])
+            elif batch:
+                batch['items'][job['meta']['index']].update(status=job['status'], error=job['error'])
+
+            # A slot just freed up; batches that found the queue full earlier get another try
+            for batch in self._batches.values():
+                self._advance(batch)
+
+    def status_payload(self, batch_id: str, queue_depth: int) -> Optional[Dict]:
+        """Body of a /api/batch response with the state of every item, or None if the batch is unknown"""
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            if not batch:
+                return None
+            entries = [dict(item) for item in batch['items']]
+            archive = dict(batch['archive']) if batch['archive'] else None
+
+        items = []
+        for index, entry in enumerate(entries):
+            status = entry['status']
+            if status == 'pending':
+                status = 'queued'
+            elif status == 'submitted':
+                job = self.job_queue.status(entry['job']['job_id'])
+                status = job['status'] if job else 'queued'
+            item = {'index': index, 'fileId': entry['fileId'], 'filename': entry['filename'], 'status': status}
+            if status == 'completed':
+                item['downloadUrl'] = f"/api/download/{os.path.basename(entry['output_path'])}"
+            elif entry.get('error'):
+                item['error'] = entry['error']
+            items.append(item)
+
+        completed = sum(1 for item in items if item['status'] == 'completed')
+        failed = sum(1 for item in items if item['status'] not in ('queued', 'running', 'completed'))
+        if archive and archive['status'] not in ('queued', 'running'):
+            status = archive['status']
+        elif failed == len(items):
+            status = 'failed'
+        elif archive or any(item['status'] != 'queued' for item in items):
+            status = 'running'
+        else:
+            status = 'queued'
+
+        response = {
+            'success': True,
+            'batchId': batch_id,
+            'status': status,
+            'queueDepth': queue_depth,
+            'total': len(items),
+            'completed': completed,
+            'failed': failed,
+            'items': items
+        }
+        if status == 'completed':
+            response['downloadUrl'] = f"/api/download/{batch_filename(batch_id)}"
+            response['filename'] = batch_filename(batch_id)
+        elif status != 'running' and status != 'queued':
+            response['error'] = (archive or {}).get('error') or f'All {len(items)} conversions failed'
+        return response
+
+    def _advance(self, batch: Dict, required: bool = False):
+        """
+        Queue the batch's next items up to in_flight, then its zip once every item has finished.
+
+        A full queue leaves the rest for a later call; with required, a batch
+        that could not queue anything raises the QueueFullError instead.
+        """
+        queued = sum(1 for item in batch['items'] if item['status'] == 'submitted')
+        for item in batch['items']:
+            if queued >= self.in_flight:
+                return
+            if item['status'] != 'pending':
+                continue
+            try:
+                self.job_queue.submit(**item['job'])
+            except QueueFullError:
+                if required and not queued:
+                    raise
+                return
+            item['status'] = 'submitted'
+            queued += 1
+
+        if queued or batch['archive']:
+            return
+        decks = [[item['output_path'], item['name']] for item in batch['items'] if item['status'] == 'completed']
+        if not decks:
+            return  # Every conversion failed: nothing to zip
+        zip_path = os.path.join(OUTPUT_FOLDER, batch_filename(batch['id']))
+        try:
+            self.job_queue.submit(decks=decks, zip_path=zip_path, job_id=f"{batch['id']}-zip", meta={
+                'batchId': batch['id'],
+                'archive': True,
+                'filename': os.path.basename(zip_path),
+                'format': 'batch'
+            })
+        except QueueFullError:
+            return
+        batch['archive'] = {'status': 'queued', 'error': None}
+
+    def _trim_history(self):
+        """Drop the oldest batches with nothing left to run once the history limit is exceeded"""
+        for batch_id in list(self._batches):
+            if len(self._batches) <= self.max_history:
+                break
+            batch = self._batches[batch_id]
+            archive = batch['archive']
+            if (archive and archive['status'] not in ('queued', 'running')) or (
+                    not archive and all(item['status'] not in ('pending', 'submitted') for item in batch['items'])):
+                del self._batches[batch_id]
+
+
+def status_payload(job_id: str, job: Optional[Dict], queue_depth: int) -> Optional[Dict]:
+    """Body of a /api/status response, or None if the job is unknown"""
+    if not job:
+        return None
+
+    response = {
+        'success': True,
+        'jobId': job_id,
+        'status': job['status'],
+        'queueDepth': queue_depth
+    }
+
+    if job['status'] == 'completed':
+        filename = job['meta']['filename']
+        response['downloadUrl'] = f'/api/download/{filename}'
+        response['filename'] = filename
+        if 'slides_reused' in job['result']:
+            response['slidesReused'] = job['result']['slides_reused']
+            response['slidesRebuilt'] = job['result']['slides_rebuilt']
+        if 'documents' in job['result']:
+            response['documents'] = [
+                {'title': document['title'], 'sections': document['sections'], 'slides': document['slides']}
+                for document in job['result']['documents']
+            ]
+        if 'output_bytes' in job['result']:
+            response['outputBytes'] = job['result']['output_bytes']
+            response['saveSeconds'] = job['result']['save_seconds']
+    elif job['error']:
+        response['error'] = job['error']
+
+    return response
+
+
+def record_job_metrics(job: Dict):
+    """Fold the phase timings reported by a finished worker job into the metrics"""
+    result = job.get('result') or {}
+    metrics.inc('doc2ppt_jobs_total', status=job['status'])
+
+    for phase, seconds in result.get('timings', {}).items():
+        metrics.observe('doc2ppt_phase_seconds', seconds, phase=phase, format=job['meta'].get('format', ''))
+
+    if 'output_bytes' in result:
+        metrics.observe('doc2ppt_output_bytes', result['output_bytes'], format=job['meta'].get('format', ''))
+
+    if job['status'] != 'completed':
+        metrics.inc('doc2ppt_errors_total', phase=result.get('failed_phase') or job['status'])
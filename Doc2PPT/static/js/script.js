@@ -144,9 +144,16 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(convertData.message || 'Conversion failed');
             }
 
+            // Wait for the queued job to finish (cached results come back immediately)
+            let jobData = convertData;
+            if (!convertData.downloadUrl) {
+                updateProgress(70, 'Waiting for conversion job...');
+                jobData = await waitForJob(convertData.statusUrl);
+            }
+
             // Success
             updateProgress(100, 'Conversion complete!');
-            showDownloadLink(convertData.downloadUrl, convertData.filename);
+            showDownloadLink(jobData.downloadUrl, jobData.filename);
             console.log('Conversion successful!');
 
         } catch (error) {
@@ -158,6 +165,28 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // Helper functions
+    async function waitForJob(statusUrl) {
+        while (true) {
+            const statusResponse = await fetch(`http://localhost:5000${statusUrl}`);
+            const statusData = await statusResponse.json().catch(() => ({}));
+
+            if (!statusResponse.ok) {
+                throw new Error(statusData.error || 'Could not fetch conversion status');
+            }
+
+            console.log('Job status:', statusData);
+
+            if (statusData.status === 'completed') {
+                return statusData;
+            }
+            if (statusData.status === 'failed' || statusData.status === 'timeout') {
+                throw new Error(statusData.error || 'Conversion failed');
+            }
+
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     function validateFileType(file) {
         const validTypes = [
             'application/pdf',
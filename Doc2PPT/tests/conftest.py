@@ -0,0 +1,6 @@
+# tests/conftest.py - Shared pytest setup
+import os
+import sys
+
+# Modules import each other from the Doc2PPT directory (e.g. `from config import Config`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+# tests/test_conversion_cache.py - Content-addressed deck cache
+import os
+import time
+
+from modules.conversion_cache import ConversionCache
+
+
+def write(path, data: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(data)
+    return str(path)
+
+
+def test_hit_after_put(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    document = write(tmp_path / "doc.txt", b"revenue grew")
+    key = cache.make_key(document, options={"audience_level": "executive"})
+
+    assert cache.get(key) is None
+    cached = cache.put(key, write(tmp_path / "deck.pptx", b"deck"))
+
+    assert cache.get(key) == cached
+    with open(cached, "rb") as file:
+        assert file.read() == b"deck"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 4}
+
+
+def test_key_covers_content_and_options(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    document = write(tmp_path / "doc.txt", b"revenue grew")
+    key = cache.make_key(document, options={"audience_level": "executive"})
+
+    assert cache.make_key(document, options={"audience_level": "technical"}) != key
+    write(tmp_path / "doc.txt", b"revenue fell")
+    assert cache.make_key(document, options={"audience_level": "executive"}) != key
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_entries=2)
+
+    # Entries are hard links, so each needs a deck of its own for its own mtime
+    for key in ("a", "b"):
+        cache.put(key, write(tmp_path / f"{key}.pptx", b"deck"))
+        os.utime(cache._entry_path(key), (time.time() - 60, time.time() - 60))
+    assert cache.get("a")  # "b" is now the least recently used
+    cache.put("c", write(tmp_path / "c.pptx", b"deck"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+
+
+def test_evicts_past_byte_limit(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_bytes=10)
+    cache.put("old", write(tmp_path / "old.pptx", b"x" * 8))
+    os.utime(cache._entry_path("old"), (time.time() - 60, time.time() - 60))
+    cache.put("new", write(tmp_path / "new.pptx", b"y" * 8))
+
+    assert cache.get("old") is None
+    assert cache.get("new")
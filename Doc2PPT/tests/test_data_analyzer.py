@@ -0,0 +1,67 @@
+# tests/test_data_analyzer.py - Table parsing and statistics
+import pandas as pd
+import pytest
+
+from modules.data_analyzer import DataAnalyzer
+
+
+def test_text_header_row_names_columns():
+    frame = DataAnalyzer._table_frame([["Region", "Sales"], ["North", "1,200"], ["South", "900"]])
+
+    assert list(frame.columns) == ["Region", "Sales"]
+    assert frame["Sales"].tolist() == [1200, 900]
+    assert frame["Region"].tolist() == ["North", "South"]
+
+
+def test_numeric_first_row_is_data():
+    frame = DataAnalyzer._table_frame([["2021", "10"], ["2022", "12"]])
+
+    assert list(frame.columns) == ["Column 1", "Column 2"]
+    assert len(frame) == 2
+
+
+def test_header_with_gaps_is_data():
+    frame = DataAnalyzer._table_frame([["Region", ""], ["North", "5"]])
+
+    assert list(frame.columns) == ["Column 1", "Column 2"]
+
+
+def test_duplicate_headers_are_numbered():
+    frame = DataAnalyzer._table_frame([["Q", "Q", "Q"], ["1", "2", "3"]])
+
+    assert list(frame.columns) == ["Q", "Q 2", "Q 3"]
+
+
+def test_units_move_into_the_header():
+    frame = DataAnalyzer._table_frame([
+        ["Item", "Price", "Margin", "Cost ($)"],
+        ["A", "$1,250.50", "12%", "$3"],
+        ["B", "$(300)", "8.5%", "$4"],
+        ["C", "($75)", "-1%", "$5"],
+    ])
+
+    assert list(frame.columns) == ["Item", "Price ($)", "Margin (%)", "Cost ($)"]
+    assert frame["Price ($)"].tolist() == pytest.approx([1250.5, -300, -75])
+    assert frame["Margin (%)"].tolist() == pytest.approx([12, 8.5, -1])
+
+
+def test_mixed_units_stay_text():
+    frame = DataAnalyzer._table_frame([["Item", "Price"], ["A", "$10"], ["B", "€12"]])
+
+    assert frame["Price"].tolist() == ["$10", "€12"]
+    assert not pd.api.types.is_numeric_dtype(frame["Price"])
+
+
+def test_mostly_text_column_stays_text():
+    frame = DataAnalyzer._table_frame([["Name", "Code"], ["a", "1"], ["b", "x2"], ["c", "y3"]])
+
+    assert frame["Code"].tolist() == ["1", "x2", "y3"]
+
+
+def test_stats_cover_numeric_columns():
+    table = DataAnalyzer.build_table("Sales", [["Region", "Sales"], ["North", "10"], ["South", "30"]])
+
+    assert table["stats"]["Sales_count"] == 2
+    assert table["stats"]["Sales_mean"] == pytest.approx(20)
+    assert table["stats"]["Sales_max"] == pytest.approx(30)
+    assert not any(key.startswith("Region") for key in table["stats"])
@@ -0,0 +1,115 @@
+# tests/test_docx_parsing.py - DOCX extraction against python-docx
+import copy
+
+import docx
+import pytest
+from docx.oxml import parse_xml
+
+from benchmarks.synthetic import VARIANTS, generate_document
+from modules.document_parser import DocumentParser
+
+NSDECLS = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+TOC = f"""
+<w:sdt {NSDECLS}>
+  <w:sdtPr><w:docPartObj><w:docPartGallery w:val="Table of Contents"/></w:docPartObj></w:sdtPr>
+  <w:sdtContent>
+    <w:p><w:r><w:t>Contents</w:t></w:r></w:p>
+    <w:p><w:r><w:t>Introduction 1</w:t></w:r></w:p>
+    <w:p><w:r><w:t>Results 2</w:t></w:r></w:p>
+  </w:sdtContent>
+</w:sdt>
+"""
+
+TEXT_BOX = f"""
+<w:r {NSDECLS}>
+  <mc:AlternateContent>
+    <mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>
+      <w:p><w:r><w:t>Callout text</w:t></w:r></w:p>
+    </w:txbxContent></wps:txbx></w:drawing></mc:Choice>
+    <mc:Fallback><w:pict><v:textbox><w:txbxContent>
+      <w:p><w:r><w:t>Callout text</w:t></w:r></w:p>
+    </w:txbxContent></v:textbox></w:pict></mc:Fallback>
+  </mc:AlternateContent>
+</w:r>
+"""
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    """A document with a table of contents, a text box and a nested table"""
+    doc = docx.Document()
+    doc.add_heading("Report", 1)
+    intro = doc.add_paragraph("Anchors a ")
+    intro._p.append(parse_xml(TEXT_BOX))
+    intro.add_run("text box")
+    doc.add_paragraph("Line one\nline two\tindented")
+    doc.add_heading("Figures", 2)
+    table = doc.add_table(rows=3, cols=2)
+    for i, row in enumerate(table.rows):
+        for j, cell in enumerate(row.cells):
+            cell.text = f"r{i}c{j}"
+    table.cell(2, 1).add_table(rows=1, cols=1).cell(0, 0).text = "inner"
+    doc.add_paragraph("After the table")
+
+    body = doc.element.body
+    body.insert(0, parse_xml(TOC))
+    body.insert(2, copy.deepcopy(parse_xml(TOC)))
+
+    path = tmp_path / "report.docx"
+    doc.save(path)
+    return str(path)
+
+
+def _parse(path, extract_tables):
+    parser = DocumentParser(path)
+    parser.extract_tables = extract_tables
+    return parser, list(parser._iter_docx_lines())
+
+
+def test_paragraphs_match_python_docx(docx_path):
+    doc = docx.Document(docx_path)
+    expected = []
+    for paragraph in doc.paragraphs:
+        if paragraph.style.name.startswith("Heading"):
+            expected.append("# " + paragraph.text)
+        else:
+            expected.extend(paragraph.text.split("\n"))
+
+    _, lines = _parse(docx_path, extract_tables=True)
+
+    assert lines == expected
+    assert not any("Contents" in line or "Introduction" in line for line in lines)
+    assert "Anchors a text box" in lines
+    assert not any("Callout" in line for line in lines)
+
+
+def test_tables_match_python_docx(docx_path):
+    doc = docx.Document(docx_path)
+    expected = [[cell.text for cell in row.cells] for row in doc.tables[0].rows]
+    expected[2][1] = "r2c1 inner"  # The nested table is flattened into its cell
+
+    parser, _ = _parse(docx_path, extract_tables=True)
+    _, lines = _parse(docx_path, extract_tables=False)
+
+    assert len(parser.raw_tables) == 1
+    assert parser.raw_tables[0]["rows"] == expected
+    assert [" | ".join(row) for row in expected] == [line for line in lines if " | " in line]
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_sections_match_python_docx(tmp_path, variant):
+    path = generate_document(str(tmp_path), "docx", 3, variant)
+
+    lines = []
+    for paragraph in docx.Document(path).paragraphs:
+        lines.append("# " + paragraph.text if paragraph.style.name.startswith("Heading") else paragraph.text)
+    parser = DocumentParser(path)
+    expected = parser._structure_content("\n".join(lines))
+
+    assert DocumentParser(path).parse().sections == expected
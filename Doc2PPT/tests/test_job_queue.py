@@ -0,0 +1,154 @@
+# tests/test_job_queue.py - Job queues: timeouts, crashes, worker reuse and load shedding
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from modules.job_queue import AsyncJobQueue, JobQueue, QueueFullError
+
+
+def work(action: str = "return", seconds: float = 0.0) -> dict:
+    """Job target run in the worker processes"""
+    if action == "sleep":
+        time.sleep(seconds)
+    elif action == "crash":
+        os._exit(3)
+    return {"success": True, "pid": os.getpid()}
+
+
+def wait_for(job_queue, job_id: str, timeout: float = 30) -> dict:
+    """Poll until a job has finished and return its record"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.status(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def make(**kwargs):
+        job_queue = JobQueue(work, **kwargs)
+        queues.append(job_queue)
+        return job_queue
+
+    yield make
+    for job_queue in queues:
+        job_queue.shutdown()
+
+
+def test_timeout_terminates_only_that_job(make_queue):
+    job_queue = make_queue(workers=1, job_timeout=0.5)
+
+    slow = wait_for(job_queue, job_queue.submit(action="sleep", seconds=30))
+    assert slow["status"] == "timeout"
+    assert "timeout" in slow["error"]
+
+    # The killed worker is replaced for the next job
+    assert wait_for(job_queue, job_queue.submit())["status"] == "completed"
+
+
+def test_crash_reports_exit_code(make_queue):
+    job_queue = make_queue(workers=1)
+
+    crashed = wait_for(job_queue, job_queue.submit(action="crash"))
+    assert crashed["status"] == "failed"
+    assert "exit code 3" in crashed["error"]
+
+    assert wait_for(job_queue, job_queue.submit())["status"] == "completed"
+
+
+def test_workers_are_reused_then_retired(make_queue):
+    job_queue = make_queue(workers=1, max_jobs_per_worker=2)
+
+    pids = [wait_for(job_queue, job_queue.submit())["result"]["pid"] for _ in range(3)]
+    assert pids[0] == pids[1]
+    assert pids[2] != pids[1]
+
+
+def test_full_queue_rejects_jobs(make_queue):
+    job_queue = make_queue(workers=1, max_depth=1)
+
+    running = job_queue.submit(action="sleep", seconds=1)
+    while job_queue.status(running)["status"] == "queued":
+        time.sleep(0.01)
+    queued = job_queue.submit()
+
+    with pytest.raises(QueueFullError):
+        job_queue.submit()
+    assert wait_for(job_queue, queued)["status"] == "completed"
+
+
+def test_async_queue_sheds_load_with_retry_after():
+    async def scenario():
+        job_queue = AsyncJobQueue(work, workers=1, max_depth=1, job_timeout=60, default_retry_after=7)
+        try:
+            first = job_queue.submit(action="sleep", seconds=0.3)
+            job_queue.submit(action="sleep", seconds=0.3)
+            with pytest.raises(QueueFullError) as full:
+                job_queue.submit()
+            assert full.value.retry_after == 7  # No job has finished yet
+
+            while job_queue.status(first)["status"] != "completed":
+                await asyncio.sleep(0.02)
+            job_queue.submit(action="sleep", seconds=0.3)
+            with pytest.raises(QueueFullError) as full:
+                job_queue.submit()
+            assert 1 <= full.value.retry_after <= 60  # Estimated from the finished job
+
+            while job_queue.depth or job_queue._running:
+                await asyncio.sleep(0.02)
+        finally:
+            job_queue.shutdown()
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def asgi_app(tmp_path, monkeypatch):
+    """The ASGI module, imported with uploads and outputs under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("asgi", None)
+    import asgi
+
+    yield asgi
+    asgi.job_queue.shutdown()
+    sys.modules.pop("asgi", None)
+
+
+def test_asgi_convert_answers_429_with_retry_after(asgi_app, tmp_path, monkeypatch):
+    document = tmp_path / "notes.txt"
+    document.write_text("# Notes\nSome text\n")
+    asgi_app.upload_registry.register("doc", str(document), "notes.txt")
+    monkeypatch.setattr(asgi_app, "serve_cached", lambda *args: False)
+
+    def saturated(**kwargs):
+        raise QueueFullError("Conversion capacity is saturated, try again later", retry_after=9)
+
+    monkeypatch.setattr(asgi_app.job_queue, "submit", saturated)
+
+    async def request():
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/api/convert/doc", "query_string": b"",
+                 "headers": [(b"content-type", b"application/json")]}
+        await asgi_app.application(scope, receive, send)
+        return messages
+
+    start, body = asyncio.run(request())[:2]
+    assert start["status"] == 429
+    assert (b"retry-after", b"9") in [(name.lower(), value) for name, value in start["headers"]]
+    assert "saturated" in json.loads(body["body"])["error"]
@@ -0,0 +1,48 @@
+# tests/test_text_encoding.py - Encoding detection and streaming of TXT documents
+import codecs
+
+import pytest
+
+from modules.document_parser import DocumentParser, _detect_encoding
+
+TEXT = "# Résumé\nCafé revenue rose 12% — to €1.2 million\n"
+
+
+@pytest.mark.parametrize("bom, encoding", [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+])
+def test_byte_order_mark_wins(bom, encoding):
+    assert _detect_encoding(bom + b"text") == encoding
+
+
+@pytest.mark.parametrize("encoding", ["utf-16-le", "utf-16-be"])
+def test_utf16_without_bom(encoding):
+    assert _detect_encoding(TEXT.encode(encoding)) == encoding
+
+
+def test_utf8_and_cut_off_character():
+    sample = TEXT.encode("utf-8")
+    assert _detect_encoding(sample) == "utf-8"
+    assert _detect_encoding(sample[:sample.index("é".encode()) + 1]) == "utf-8"
+
+
+def test_windows_1252():
+    assert _detect_encoding(TEXT.encode("cp1252")) == "cp1252"
+
+
+def test_latin1_when_cp1252_is_undefined():
+    assert _detect_encoding(b"caf\xe9 \x81") == "latin-1"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "utf-16-le", "cp1252"])
+def test_txt_documents_decode(tmp_path, encoding):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(TEXT.replace("\n", "\r\n").encode(encoding))
+
+    sections = DocumentParser(str(path)).parse().sections
+
+    assert [section["title"] for section in sections] == ["Résumé"]
+    assert sections[0]["content"] == ["Café revenue rose 12% — to €1.2 million"]
@@ -1,11 +1,25 @@
 # utils/logger.py - Logging utility
+import json
 import logging
 
+
+class StructuredFormatter(logging.Formatter):
+    """Appends structured span data (see utils/metrics.py) to the log line as JSON"""
+
+    def format(self, record):
+        message = super().format(record)
+        span = getattr(record, 'span', None)
+        if span:
+            message += ' ' + json.dumps(span, sort_keys=True, default=str)
+        return message
+
+
 def setup_logging():
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter('%(asctime)s - %(levelname)s - %(message)s'))
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.StreamHandler()
+            handler
         ]
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,161 @@
+# utils/metrics.py - Timing spans and Prometheus-style metrics
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("doc2ppt.metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+try:
+    import psutil
+except ImportError:  # Optional: only needed where /proc is not available
+    psutil = None
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB, or None where no source exposes it"""
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    # Not ru_maxrss: that is the peak, and differences of it are not what a request used
+    return None
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store rendered in the Prometheus text format.
+
+    Metrics are declared once with describe() and then updated through
+    observe() (histograms), inc() (counters) and set() (gauges), each with
+    an arbitrary set of labels.
+    """
+
+    def __init__(self):
+        self._meta = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple = DEFAULT_BUCKETS):
+        self._meta[name] = {"kind": kind, "help": help_text, "buckets": buckets}
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._meta[name]["buckets"]
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            entry = series.setdefault(key, {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0})
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                entry["buckets"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values.setdefault(name, {})[self._key(labels)] = value
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, meta in self._meta.items():
+                lines.append(f"# HELP {name} {meta['help']}")
+                lines.append(f"# TYPE {name} {meta['kind']}")
+                for key, value in sorted(self._values.get(name, {}).items()):
+                    if meta["kind"] == "histogram":
+                        cumulative = 0
+                        for bound, count in zip(meta["buckets"], value["buckets"]):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{self._labels(key + (('le', bound),))} {cumulative}")
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', '+Inf'),))} {value['count']}")
+                        lines.append(f"{name}_sum{self._labels(key)} {value['sum']}")
+                        lines.append(f"{name}_count{self._labels(key)} {value['count']}")
+                    else:
+                        lines.append(f"{name}{self._labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _key(labels: Dict) -> Tuple:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _labels(key: Tuple) -> str:
+        if not key:
+            return ""
+        pairs = ",".join(f'{k}="{str(v)}"' for k, v in key)
+        return "{" + pairs + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("doc2ppt_phase_seconds", "histogram", "Duration of conversion phases")
+metrics.describe("doc2ppt_errors_total", "counter", "Failed conversion phases")
+metrics.describe("doc2ppt_output_bytes", "histogram", "Size of generated presentations",
+                 buckets=tuple(2 ** n * 1024 for n in range(6, 18, 2)))
+metrics.describe("doc2ppt_http_request_seconds", "histogram", "Duration of HTTP requests")
+metrics.describe("doc2ppt_jobs_total", "counter", "Finished conversion jobs by status")
+metrics.describe("doc2ppt_job_queue_depth", "gauge", "Conversion jobs waiting for a worker")
+
+
+@contextmanager
+def span(phase: str, **labels):
+    """
+    Time a block, log it as a structured record and record it in the phase histogram.
+
+    The yielded dict is the span record; it holds seconds, RSS and status
+    once the block exits.
+    """
+    record = {"phase": phase, **labels}
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+        record["status"] = "ok"
+    except Exception:
+        record["status"] = "error"
+        metrics.inc("doc2ppt_errors_total", phase=phase)
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        rss_after = rss_mb()
+        if rss_after is not None and rss_before is not None:
+            record["rss_mb"] = round(rss_after, 2)
+            record["rss_delta_mb"] = round(rss_after - rss_before, 2)
+        metrics.observe("doc2ppt_phase_seconds", record["seconds"], phase=phase, format=labels.get("format", ""))
+        logger.info(f"{phase} finished in {record['seconds']:.3f}s", extra={"span": record})
+
+
+class PhaseTimer:
+    """Collects the spans of one unit of work, e.g. a single conversion"""
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.timings = {}
+        self.failed_phase = None
+
+    @contextmanager
+    def span(self, phase: str):
+        try:
+            with span(phase, **self.labels) as record:
+                yield record
+        except Exception:
+            if self.failed_phase is None:
+                self.failed_phase = phase
+            raise
+        finally:
+            # A phase run more than once (e.g. per document of a merge) accumulates
+            self.timings[phase] = round(self.timings.get(phase, 0) + record["seconds"], 6)